@@ -0,0 +1,239 @@
+"""
+Benchmarks of the Huffman, Message and Parser hot paths and of end-to-end Demo.read on
+synthetic demos. Throughput is compared with the stored baseline, a benchmark slower than
+the baseline by more than the tolerance fails the run.
+
+usage: python -m benchmarks.bench [-h] [-k FILTER] [-r REPEAT] [-t TOLERANCE] [--json] [--save]
+"""
+
+import contextlib
+import io
+import json
+import pathlib
+import random
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+
+from bitarray import bitarray
+from tabulate import tabulate
+
+from democonverter.demo import Demo
+from democonverter.generator import DemoGenerator
+from democonverter.huffman import Huffman
+from democonverter.message import Message
+from democonverter.parser import Parser
+
+BASELINE_PATH = pathlib.Path(__file__).with_name('baseline.json')
+DEMO_SIZES = {'small': 10, 'medium': 30, 'large': 120}  # seconds of game time
+
+
+class Benchmark:
+    """
+    Timed function and the operations (values, messages) and bytes it processes per run.
+    """
+
+    def __init__(self, name, function, operations, size):
+        self.name = name
+        self.function = function
+        self.operations = operations
+        self.size = size
+
+    def run(self, repeat):
+        """
+        Returns (operations/s, MB/s) of the fastest run. Each run loops the function for at
+        least 0.2 seconds.
+        """
+        timer = timeit.Timer(self.function)
+        loops = timer.autorange()[0]
+        best = min(timer.repeat(repeat, loops)) / loops
+        return self.operations / best, self.size / best / pow(1024, 2)
+
+
+def write_message(msg, fields):
+    for value, count in fields:
+        msg.write_bits(value, count)
+
+
+def write_string(msg, string):
+    write_message(msg, [(char, 8) for char in string.encode()] + [(0, 8)])
+
+
+def huffman_benchmarks():
+    huffman = Huffman()
+    symbols = list(range(256)) * 64
+    data = bitarray(endian='little')
+    for symbol in symbols:
+        data += huffman.encode(symbol)
+    offsets = []
+    offset = 0
+    for symbol in symbols:
+        offsets.append(offset)
+        offset += len(huffman.encode(symbol))
+
+    def encode():
+        for symbol in symbols:
+            huffman.encode(symbol)
+
+    def decode():
+        for offset in offsets:
+            huffman.decode_window(data, offset)
+
+    size = len(data) // 8
+    return [
+        Benchmark('huffman_encode', encode, len(symbols), size),
+        Benchmark('huffman_decode', decode, len(symbols), size),
+    ]
+
+
+def message_benchmarks():
+    rnd = random.Random(0)
+    values = [rnd.getrandbits(32) for _ in range(4096)]
+    msg = Message(bitarray())
+    write_message(msg, [(value, 32) for value in values])
+    msg.fill()
+    longs = msg.get_message_bytes()
+
+    strings = ['^1player{} ^7scored {} frags'.format(i, i * 7) for i in range(512)]
+    msg = Message(bitarray())
+    for string in strings:
+        write_string(msg, string)
+    msg.fill()
+    string_bytes = msg.get_message_bytes()
+
+    def read_bits():
+        msg = Message(longs)
+        for _ in values:
+            msg.read_bits(32)
+
+    def write_bits():
+        msg = Message(bitarray())
+        for value in values:
+            msg.write_bits(value, 32)
+
+    def read_string():
+        msg = Message(string_bytes)
+        for _ in strings:
+            msg.read_string()
+
+    return [
+        Benchmark('message_read_bits', read_bits, len(values), len(longs)),
+        Benchmark('message_write_bits', write_bits, len(values), len(longs)),
+        Benchmark('message_read_string', read_string, len(strings), len(string_bytes)),
+    ]
+
+
+def parser_benchmarks(demo_dir):
+    generator = DemoGenerator(DEMO_SIZES['small'], seed=0)
+    messages = [msg_bytes for _, msg_bytes in generator.iter_messages()]
+    size = sum(len(msg_bytes) for msg_bytes in messages)
+    demo_path = pathlib.Path(demo_dir, 'parser.dm_71')
+    with open(demo_path, 'wb') as demo_file:
+        generator.write(demo_file)
+
+    def parse(convert):
+        parser = Parser(Demo(str(demo_path)), convert)
+        for msg_seq, msg_bytes in enumerate(messages):
+            parser.parse_message(Message(msg_bytes, convert), msg_seq)
+
+    return [
+        Benchmark('parser_parse_snapshot', lambda: parse(False), len(messages), size),
+        Benchmark('parser_convert_snapshot', lambda: parse(True), len(messages), size),
+    ]
+
+
+def demo_benchmarks(demo_dir):
+    benchmarks = []
+    for name, duration in DEMO_SIZES.items():
+        generator = DemoGenerator(duration, seed=0)
+        demo_path = pathlib.Path(demo_dir, '{}.dm_71'.format(name))
+        with open(demo_path, 'wb') as demo_file:
+            generator.write(demo_file)
+        message_count = generator.get_message_count()
+        output_dir = str(pathlib.Path(demo_dir, 'out'))
+
+        def read(convert, demo_path=demo_path):
+            with contextlib.redirect_stdout(io.StringIO()):
+                Demo(str(demo_path)).read(convert, output_dir)
+
+        size = demo_path.stat().st_size
+        benchmarks += [
+            Benchmark('demo_info_' + name, lambda read=read: read(False), message_count, size),
+            Benchmark('demo_convert_' + name, lambda read=read: read(True), message_count, size),
+        ]
+    return benchmarks
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns report rows and names of benchmarks slower than baseline by more than tolerance.
+    """
+    rows = []
+    regressions = []
+    for name, (operations, megabytes) in results.items():
+        row = [name, round(operations), round(megabytes, 2)]
+        if name in baseline:
+            change = operations / baseline[name]['ops_per_s'] - 1
+            row.append('{:+.1%}'.format(change))
+            if change < -tolerance:
+                regressions.append(name)
+                row.append('REGRESSION')
+        rows.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = ArgumentParser(description='Run democonverter benchmarks.')
+    parser.add_argument('-k', '--filter', default='', help='Only run benchmarks containing text')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Runs per benchmark')
+    parser.add_argument(
+        '-t',
+        '--tolerance',
+        type=float,
+        default=0.25,
+        help='Allowed slowdown against baseline. Default is 0.25',
+    )
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--save', action='store_true', help='Save results as the baseline')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as demo_dir:
+        benchmarks = (
+            huffman_benchmarks()
+            + message_benchmarks()
+            + parser_benchmarks(demo_dir)
+            + demo_benchmarks(demo_dir)
+        )
+        results = {
+            benchmark.name: benchmark.run(args.repeat)
+            for benchmark in benchmarks
+            if args.filter in benchmark.name
+        }
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    rows, regressions = compare(results, baseline, args.tolerance)
+    if args.json:
+        print(json.dumps({'results': rows, 'regressions': regressions}, indent=2))
+    else:
+        print(
+            tabulate(
+                rows, headers=['benchmark', 'ops/s', 'MB/s', 'vs baseline', ''], floatfmt='.2f'
+            )
+        )
+
+    if args.save:
+        baseline.update(
+            {
+                name: {'ops_per_s': round(operations, 1), 'mb_per_s': round(megabytes, 3)}
+                for name, (operations, megabytes) in results.items()
+            }
+        )
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+    elif regressions:
+        print('Regressions: {}'.format(', '.join(regressions)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from democonverter.message import Message
+from democonverter.parser import Parser
+
+
+class BlockIndex:
+    """
+    Seekable index of demo blocks: file offset, message sequence, message size and snapshot
+    server time (-1 for messages without snapshot), with the demo size to check the index is
+    of the same demo. Messages can be read from any block
+    without reading the demo from the start, e.g. from a server time.
+    Saved next to the demo (demo filename + .idx) as a header and the little endian columns.
+    """
+
+    SUFFIX = '.idx'
+    NO_SNAPSHOT = -1
+    _BLOCK_HEADER_SIZE = 8  # message sequence, message size
+    _HEADER = struct.Struct('<4sHxxQI')  # magic, version, demo size, block count
+    _MAGIC = b'DMBI'
+    _VERSION = 1
+
+    def __init__(self, demo_size=0):
+        self.demo_size = demo_size
+        self.offsets = array('q')
+        self.msg_seqs = array('i')
+        self.sizes = array('i')
+        self.server_times = array('i')
+        self._snapshots = None  # (server times, block indexes) of snapshots
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, demo):
+        """
+        Indexes all blocks of a demo. Only the server time of snapshots is parsed.
+        """
+        parser = Parser(demo, snapshots=False, snapshot_times=True)
+        block_index = cls(demo._size)
+        offset = 0
+        for msg_seq, msg in demo.iter_messages():
+            msg_size = msg.get_size()
+            parser.parse_message(msg, msg_seq)
+            block_index.append(offset, msg_seq, msg_size, msg.server_time)
+            offset += cls._BLOCK_HEADER_SIZE + msg_size
+        return block_index
+
+    def append(self, offset, msg_seq, msg_size, server_time=None):
+        self.offsets.append(offset)
+        self.msg_seqs.append(msg_seq)
+        self.sizes.append(msg_size)
+        self.server_times.append(self.NO_SNAPSHOT if server_time is None else server_time)
+        self._snapshots = None
+
+    def find_time(self, server_time):
+        """
+        Returns the first block with a snapshot at or after the server time, None if there is
+        none. Snapshot server times increase through the demo.
+        """
+        if self._snapshots is None:
+            self._snapshots = [], []
+            for block, block_time in enumerate(self.server_times):
+                if block_time != self.NO_SNAPSHOT:
+                    self._snapshots[0].append(block_time)
+                    self._snapshots[1].append(block)
+        snapshot_times, snapshot_blocks = self._snapshots
+        snapshot = bisect_left(snapshot_times, server_time)
+        if snapshot < len(snapshot_blocks):
+            return snapshot_blocks[snapshot]
+
+    def get_range(self, start, stop=None):
+        """
+        File offset and size of the blocks from start to stop (exclusive), e.g. to copy a
+        segment or split the demo into message ranges.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start < len(self):
+            offset = self.offsets[start]
+        else:  # after the last block, the end of demo block if the demo has one
+            offset = self._get_block_end(len(self) - 1) if self else 0
+        end = self._get_block_end(stop - 1) if start < stop else offset
+        return offset, end - offset
+
+    def _get_block_end(self, block):
+        return self.offsets[block] + self._BLOCK_HEADER_SIZE + self.sizes[block]
+
+    def iter_messages(self, demo_data, start=0, stop=None, convert=False):
+        """
+        Yields (message sequence, message) of the blocks from start to stop (exclusive) of the
+        demo data (bytes-like, e.g. memory mapped demo file).
+        """
+        demo_data = memoryview(demo_data)
+        for block in range(start, len(self) if stop is None else stop):
+            offset = self.offsets[block] + self._BLOCK_HEADER_SIZE
+            yield self.msg_seqs[block], Message(
+                demo_data[offset : offset + self.sizes[block]], convert
+            )
+
+    def save(self, demo_filename):
+        with open(demo_filename + self.SUFFIX, 'wb') as index_file:
+            index_file.write(
+                self._HEADER.pack(self._MAGIC, self._VERSION, self.demo_size, len(self))
+            )
+            for column in self._columns():
+                if sys.byteorder == 'big':
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(index_file)
+
+    @classmethod
+    def load(cls, demo_filename, demo_size=None):
+        """
+        Loads the index of a demo. With demo size, raises ValueError if the index is not of
+        a demo of the same size.
+        """
+        with open(demo_filename + cls.SUFFIX, 'rb') as index_file:
+            magic, version, index_demo_size, count = cls._HEADER.unpack(
+                index_file.read(cls._HEADER.size)
+            )
+            if magic != cls._MAGIC or version != cls._VERSION:
+                raise ValueError('Not a demo block index', demo_filename + cls.SUFFIX)
+            if demo_size is not None and demo_size != index_demo_size:
+                raise ValueError('Demo block index is out of date', demo_filename + cls.SUFFIX)
+            block_index = cls(index_demo_size)
+            for column in block_index._columns():
+                column.fromfile(index_file, count)
+                if sys.byteorder == 'big':
+                    column.byteswap()
+        return block_index
+
+    def _columns(self):
+        return self.offsets, self.msg_seqs, self.sizes, self.server_times
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import pathlib
+import sqlite3
+
+from democonverter.converter import CONVERSION_VERSION
+
+
+class ConversionCache:
+    """
+    Index of converted demos in the output directory, keyed by the converted demo name with
+    the input content hash and conversion version. A demo is converted if the output is
+    unchanged since conversion and the input has the same content and conversion version.
+    Input size and modification time are kept, so unchanged inputs are not hashed again.
+    """
+
+    FILENAME = '.democonverter-cache.sqlite'
+    _HASH_CHUNK_SIZE = 1_048_576
+
+    def __init__(self, output_dir, version=CONVERSION_VERSION):
+        self.version = version
+        self._connection = sqlite3.connect(str(pathlib.Path(output_dir, self.FILENAME)), 30)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS conversions ('
+            'output TEXT PRIMARY KEY, input_hash TEXT, version INTEGER, input_path TEXT, '
+            'input_size INTEGER, input_mtime_ns INTEGER, '
+            'output_size INTEGER, output_mtime_ns INTEGER)'
+        )
+        self._hashes = {}  # (input path, size, modification time): content hash
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def is_converted(self, demo_filename, converted_filename):
+        row = self._connection.execute(
+            'SELECT input_hash, version, input_path, input_size, input_mtime_ns, output_size, '
+            'output_mtime_ns FROM conversions WHERE output = ?',
+            (self._key(converted_filename),),
+        ).fetchone()
+        if not row or row[1] != self.version:
+            return False
+        input_hash, _, input_path, input_size, input_mtime_ns, output_size, output_mtime_ns = row
+        try:
+            if self._stat(converted_filename) != (output_size, output_mtime_ns):
+                return False
+            demo_stat = self._stat(demo_filename)
+        except FileNotFoundError:
+            return False
+
+        demo_path = str(pathlib.Path(demo_filename).resolve())
+        if (demo_path, *demo_stat) == (input_path, input_size, input_mtime_ns):
+            return True
+        if self._hash(demo_filename) != input_hash:
+            return False
+        with self._connection:
+            self._connection.execute(
+                'UPDATE conversions SET input_path = ?, input_size = ?, input_mtime_ns = ? '
+                'WHERE output = ?',
+                (demo_path, *demo_stat, self._key(converted_filename)),
+            )
+        return True
+
+    def add(self, demo_filename, converted_filename):
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    self._key(converted_filename),
+                    self._hash(demo_filename),
+                    self.version,
+                    str(pathlib.Path(demo_filename).resolve()),
+                    *self._stat(demo_filename),
+                    *self._stat(converted_filename),
+                ),
+            )
+
+    def _hash(self, demo_filename):
+        key = (str(pathlib.Path(demo_filename).resolve()), *self._stat(demo_filename))
+        if key not in self._hashes:
+            content_hash = hashlib.sha256()
+            with open(demo_filename, 'rb') as demo_file:
+                while chunk := demo_file.read(self._HASH_CHUNK_SIZE):
+                    content_hash.update(chunk)
+            self._hashes[key] = content_hash.hexdigest()
+        return self._hashes[key]
+
+    @staticmethod
+    def _key(converted_filename):
+        return pathlib.Path(converted_filename).name
+
+    @staticmethod
+    def _stat(filename):
+        stat = os.stat(filename)
+        return stat.st_size, stat.st_mtime_ns
@@ -1,35 +1,131 @@
+from functools import lru_cache
+from types import MappingProxyType
+
+from democonverter.protocol.aftershock import Aftershock
+from democonverter.protocol.quake3 import Quake3
+
+# increase when converted demos change, so cached conversions are converted again
+CONVERSION_VERSION = 1
+
+
 class Converter:
-    _convert_events_map = {}
+    """
+    Translates events from one protocol to another. Translation tables are built once per
+    (from, to) protocol pair and shared read-only by all converters of the pair.
+    Event fixes are {field name: {value: fixed value}} applied to state fields before event
+    conversion.
+    Converters of implemented conversions are registered by (from, to) protocol pair.
+    """
 
-    def __init__(self, from_protocol, to_protocol):
+    _BIT_FLAG_EVENT_COUNT = 256
+    _registry = {}  # (from protocol, to protocol): converter
+
+    def __init__(self, from_protocol, to_protocol, event_fixes=None):
         self.from_protocol = from_protocol
         self.to_protocol = to_protocol
+        self.event_fixes = MappingProxyType(event_fixes or {})
+        self._rewrites = {}  # schema: compiled rewrite tables
+        (
+            self.events_map,
+            self._entity_type_events,
+            self._bit_flag_events,
+        ) = self._translation_tables(from_protocol, to_protocol)
+        # fix: remove use item when enemy hits (22 => 0)
+        # fix: event 88 EV_THAW_THICK (88 => 0)
+
+    @classmethod
+    def register(cls, from_protocol, to_protocol, event_fixes=None):
+        converter = cls._registry[(from_protocol, to_protocol)] = cls(
+            from_protocol, to_protocol, event_fixes
+        )
+        return converter
 
-        self.set_convert_events_map()
-        # self._convert_events_map[22] = 0  # fix: remove use item when enemy hits
-        # self._convert_events_map[88] = 0  # fix: event 88 EV_THAW_THICK
+    @classmethod
+    def get(cls, from_protocol, to_protocol):
+        """
+        Registered converter of the protocol pair, None if the conversion is not implemented.
+        """
+        return cls._registry.get((from_protocol, to_protocol))
 
-    def set_convert_events_map(self):
-        for from_index, event in enumerate(self.from_protocol.events):
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _translation_tables(from_protocol, to_protocol):
+        """
+        Returns events map {from event: to event} of events with a different index, entity type
+        events table (entity type: converted entity type) and bit flag events table (event
+        without bit flags: converted event). Table entries are None for unchanged events.
+        """
+        events_map = {}
+        for from_index, event in enumerate(from_protocol.events):
             try:
-                to_index = self.to_protocol.events.index(event)
+                to_index = to_protocol.events.index(event)
             except ValueError:
                 continue
             if from_index != to_index:
-                self._convert_events_map[from_index] = to_index
+                events_map[from_index] = to_index
+
+        from_events = from_protocol.entity_types.index('ET_EVENTS')
+        to_events = to_protocol.entity_types.index('ET_EVENTS')
+        entity_type_events = [None] * (from_events + len(from_protocol.events))
+        bit_flag_events = [None] * Converter._BIT_FLAG_EVENT_COUNT
+        for from_index, to_index in events_map.items():
+            entity_type_events[from_events + from_index] = to_events + to_index
+            if from_index < len(bit_flag_events):
+                bit_flag_events[from_index] = to_index
+        return MappingProxyType(events_map), tuple(entity_type_events), tuple(bit_flag_events)
 
     def convert_entity_type_event(self, in_entity_type_event):
-        event_from = in_entity_type_event - self.from_protocol.entity_types.index('ET_EVENTS')
-        if event_from in self._convert_events_map:
-            return self._convert_events_map[event_from] + self.to_protocol.entity_types.index(
-                'ET_EVENTS'
-            )
+        if 0 <= in_entity_type_event < len(self._entity_type_events):
+            return self._entity_type_events[in_entity_type_event]
 
     def convert_bit_flag_event(self, event):
-        bit_flags = event >> 8
-        event_from = event & 0xFF
-        if event_from in self._convert_events_map:
-            return self._convert_events_map[event_from] + bit_flags * 256
+        to_event = self._bit_flag_events[event & 0xFF]
+        if to_event is not None:
+            return to_event + (event >> 8) * 256
+
+    def get_rewrites(self, schema):
+        """
+        Event rewrite tables of each schema field, compiled on first use.
+        """
+        rewrites = self._rewrites.get(schema)
+        if rewrites is None:
+            rewrites = self._rewrites[schema] = tuple(
+                self._compile_rewrite(field_name, bit_size)
+                for field_name, bit_size in zip(schema.names, schema.bit_sizes)
+            )
+        return rewrites
+
+    def _compile_rewrite(self, field_name, bit_size):
+        """
+        For both player and packet events.
+        Packet entity changes: eType, event
+        Player entity changes: events[0], events[1], externalEvent
+        Returns table of field value: rewritten value (None keeps the value) for every field
+        value, or None if the field is never rewritten. Event conversion takes precedence over
+        fixes.
+        """
+        fixes = self.event_fixes.get(field_name, {})
+        convert_event = self._EVENT_CONVERSIONS.get(field_name)
+        if bit_size <= 0 or not (fixes or convert_event):
+            return None
+
+        table = [None] * (1 << bit_size)
+        for value, fixed_value in fixes.items():
+            table[value] = fixed_value
+        if convert_event:
+            for value in range(len(table)):
+                if converted_value := convert_event(self, value):
+                    table[value] = converted_value
+        return tuple(table)
+
+    # field name: event conversion
+    _EVENT_CONVERSIONS = {
+        'eType': convert_entity_type_event,
+        'events[0]': convert_entity_type_event,
+        'events[1]': convert_entity_type_event,
+        'event': convert_bit_flag_event,
+        'externalEvent': convert_bit_flag_event,
+    }
 
     def convert_stats(self, bit_flags):
         bit_flags.fill()
@@ -46,3 +142,22 @@ class Converter:
         new_bit_flags[7] = bit_flags[5]  # 0 (if 2 is 1 remove the stat completely)
         new_bit_flags.reverse()
         return new_bit_flags
+
+
+# only implemented conversion
+# QL91 => Q3 also needs the player and entity state fields translated, not only events
+Converter.register(
+    Aftershock,
+    Quake3,
+    event_fixes={
+        'modelindex': {61: 0},  # fix bad item index 61 on entity
+        'eType': {
+            101: 0,  # fix event 88 EV_THAW_THICK
+            # 1:23 2:44
+            16: 14,  # fix event: 14 => 10
+            29: 27,  # fix event: 14 => 10
+            37: 35,  # fix event: 24 => 22
+            38: 36,  # fix event: 25 => 23
+        },
+    },
+)
@@ -1,23 +1,38 @@
+import contextlib
+import io
+import mmap
 import os.path
 import pathlib
 from enum import Enum, auto
 
+from democonverter.cache import ConversionCache
 from democonverter.message import Message
 from democonverter.parser import Parser
+from democonverter.writer import DemoWriter
 
 
 class Demo:
     MSG_SIZE_MAX = 16_384
 
-    def __init__(self, filename):
+    def __init__(self, filename=None, data=None):
+        """
+        Demo file, or demo data (bytes, bytes-like or binary file-like object) with an optional
+        filename. The demo protocol is read from the game state.
+        """
         self._filename = filename
-        demo_path = pathlib.Path(self._filename)
-        if not demo_path.exists():
-            raise FileNotFoundError('Demo not found')
-        if demo_path.suffix not in ('.dm_68', '.dm_71', '.dm_91'):
-            raise ValueError('Not a valid demo file')
-
-        self._size = os.path.getsize(filename)
+        if data is None:
+            if filename is None:
+                raise ValueError('Demo filename or data required')
+            demo_path = pathlib.Path(self._filename)
+            if not demo_path.exists():
+                raise FileNotFoundError('Demo not found')
+            if demo_path.suffix not in ('.dm_68', '.dm_71', '.dm_91'):
+                raise ValueError('Not a valid demo file')
+
+        if data is not None and not isinstance(data, (bytes, bytearray, memoryview)):
+            data = data.read()  # file-like
+        self._data = data
+        self._size = os.path.getsize(filename) if data is None else len(data)
         self.protocol = None
         self.mod = None
         self.date = None
@@ -27,31 +42,103 @@ class Demo:
         self.clients = {}
         self.game_protocol = None  # protocol+mod
 
-    def read(self, convert, output):
-        with open(self._filename, 'rb') as demo_file:
-            if convert:
-                demo_path = pathlib.Path(self._filename)
-                output_dir = pathlib.Path(output if output else 'out/')
-                if not output_dir.exists():
-                    os.makedirs(str(output_dir.resolve()), exist_ok=True)
-                converted_filename = str(output_dir.resolve()) + '/' + demo_path.name
+    def read(self, convert, output, cache=False, index=None):
+        """
+        With cache, demo files already converted to the output directory are skipped.
+        Info of read demo files is added to the index (index.DemoIndex), if set.
+        """
+        if self._filename is None:
+            raise ValueError('Demo without filename, use convert or info')
+        if convert:
+            demo_path = pathlib.Path(self._filename)
+            output_dir = pathlib.Path(output if output else 'out/')
+            if not output_dir.exists():
+                os.makedirs(str(output_dir.resolve()), exist_ok=True)
+            converted_filename = str(output_dir.resolve()) + '/' + demo_path.name
+
+            with contextlib.ExitStack() as stack:
+                conversion_cache = None
+                if cache and self._data is None:
+                    conversion_cache = stack.enter_context(ConversionCache(output_dir))
+                    if conversion_cache.is_converted(self._filename, converted_filename):
+                        if index:
+                            self.info()  # demo info for the index, without converting
+                            self._add_to_index(index)
+                        print('Skipped converted demo {} '.format(self._filename))
+                        return converted_filename
 
                 with open(converted_filename, 'wb') as converted_demo_file:
-                    self._read_messages(demo_file, converted_demo_file)
-                print('Converted demo {} '.format(self._filename))
-                return converted_filename
-            else:
-                print('Demo: {} '.format(self._filename))
-                self._read_messages(demo_file)
-                print(self)
-
-    def _read_messages(self, demo_file, converted_demo_file=None):
-        parser = Parser(self, True if converted_demo_file else None)
-
-        last_scores = None
+                    self.convert(converted_demo_file)
+                if conversion_cache:
+                    conversion_cache.add(self._filename, converted_filename)
+            self._add_to_index(index)
+            print('Converted demo {} '.format(self._filename))
+            return converted_filename
+        else:
+            print('Demo: {} '.format(self._filename))
+            print(self.info())
+            self._add_to_index(index)
+
+    def _add_to_index(self, index):
+        if index and self._data is None:
+            index.add(self._filename, self)
+
+    def convert(self, output=None):
+        """
+        Writes the converted demo to a writable binary stream, without output returns the
+        converted demo bytes.
+        """
+        if output is None:
+            output = io.BytesIO()
+            self.convert(output)
+            return output.getvalue()
+        with self._open() as demo_data:
+            with DemoWriter(output) as demo_writer:
+                self._read_messages(demo_data, demo_writer)
+
+    def info(self):
+        """
+        Reads demo info and returns it formatted.
+        """
+        with self._open() as demo_data:
+            self._read_messages(demo_data)
+        return str(self)
+
+    def iter_messages(self):
+        """
+        Yields (message sequence, message) for each demo block. Messages are not parsed.
+        """
+        with self._open() as demo_data:
+            yield from self._iter_messages(demo_data)
+
+    def iter_snapshots(self):
+        """
+        Yields (message sequence, message) for each parsed message with a snapshot. The message
+        has the snapshot server time, player state delta and entity state deltas. Demo info is
+        set from the game state before the first snapshot.
+        """
+        parser = Parser(self, delta_sink=Parser.store_delta)
+        for msg_seq, msg in self.iter_messages():
+            parser.parse_message(msg, msg_seq)
+            if msg.server_time is not None:
+                yield msg_seq, msg
+
+    def iter_states(self):
+        """
+        Yields snapshot.Snapshot with full player and entity states for each snapshot.
+        """
+        parser = Parser(self, track_states=True)
+        for msg_seq, msg in self.iter_messages():
+            parser.parse_message(msg, msg_seq)
+            if msg.server_time is not None:
+                yield parser.states.snapshot
+
+    def _iter_messages(self, demo_data, convert=False):
+        offset = 0
         while True:
-            msg_seq = int.from_bytes(demo_file.read(4), 'little', signed=True)
-            msg_size = int.from_bytes(demo_file.read(4), 'little', signed=True)
+            msg_seq = int.from_bytes(demo_data[offset : offset + 4], 'little', signed=True)
+            msg_size = int.from_bytes(demo_data[offset + 4 : offset + 8], 'little', signed=True)
+            offset += 8
 
             if msg_size < 1:  # reached end of demo
                 break
@@ -61,19 +148,49 @@ class Demo:
                         msg_size, self.MSG_SIZE_MAX
                     )
                 )
-            msg = Message(demo_file.read(msg_size))
-            scores = parser.parse_message(msg)
+            yield msg_seq, Message(demo_data[offset : offset + msg_size], convert)
+            offset += msg_size
+
+    def _read_messages(self, demo_data, demo_writer=None):
+        if demo_writer:
+            parser = Parser(self, True)
+        else:
+            parser = Parser(self, snapshots=False)
+
+        last_scores = None
+        for msg_seq, msg in self._iter_messages(demo_data, demo_writer is not None):
+            scores = parser.parse_message(msg, msg_seq)
             if scores:
                 last_scores = scores
 
-            if converted_demo_file:
-                converted_demo_file.write(msg_seq.to_bytes(4, 'little', signed=True))
-                converted_demo_file.write(msg.get_size().to_bytes(4, 'little', signed=True))
-                converted_demo_file.write(msg.get_message_bytes())
+            if demo_writer:
+                demo_writer.write(msg_seq, msg.get_message_bytes())
 
         if last_scores:
             parser.parse_scores(last_scores)
 
+    @contextlib.contextmanager
+    def _open(self):
+        """
+        Zero-copy view of the demo data or file.
+        """
+        if self._data is not None:
+            yield memoryview(self._data)
+            return
+        with open(self._filename, 'rb') as demo_file:
+            yield self._map(demo_file)
+
+    @staticmethod
+    def _map(demo_file):
+        """
+        Zero-copy view of the demo file. The memory map is closed when the view and all message
+        views are released.
+        """
+        try:
+            return memoryview(mmap.mmap(demo_file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (ValueError, OSError, io.UnsupportedOperation):  # empty or not a regular file
+            return memoryview(demo_file.read())
+
     def __str__(self):
         separator = '-' * 80 + '\n'
         info = separator
@@ -105,12 +222,18 @@ class Demo:
         TDM = 3
         CTF = auto()
 
-    def _client_scores(self, info):
-        self.clients = {
+    def get_scored_clients(self):
+        """
+        Clients with a name and score.
+        """
+        return {
             client: stats
             for client, stats in self.clients.items()
             if len(stats) > 1 and stats[0] != '.'
         }
+
+    def _client_scores(self, info):
+        self.clients = self.get_scored_clients()
         sorted_clients = {
             k: v
             for k, v in sorted(
@@ -0,0 +1,266 @@
+import random
+import struct
+from argparse import ArgumentParser
+
+from bitarray import bitarray
+
+from democonverter.message import Message
+from democonverter.parser import Parser
+from democonverter.protocol.aftershock import Aftershock
+from democonverter.writer import DemoWriter
+
+
+class DemoGenerator:
+    """
+    Generates valid synthetic Aftershock (.dm_71) demos for benchmarks and load tests.
+    Messages are encoded with Message.write_bits from the Aftershock state schemas: a game
+    state with server and client info, then one delta snapshot per server frame with player
+    state, stats and entity deltas, and periodic score commands.
+    The same seed generates the same demo.
+
+    - duration: game time in seconds
+    - entities: average number of entities in a snapshot, at most MAX_ENTITIES
+    - event_rate: probability of an event per entity delta and player state
+    - clients: number of clients, 2 is a duel
+    """
+
+    SNAPSHOT_MSEC = 50  # sv_fps 20
+    SCORES_MSEC = 30_000
+    FIRST_ENTITY = 64  # MAX_CLIENTS
+    MAX_ENTITY = 1022
+    # removed entities are replaced by new entity numbers in the same snapshot
+    MAX_ENTITIES = (MAX_ENTITY - FIRST_ENTITY + 1) // 2
+    _ServerCommand = Parser._ServerCommand
+    _ENTITY_NUM_BITS = Parser._ENTITY_NUM_BITS
+    _CLIENT_CONFIG_STRING = 544
+    _FLOAT_BITS = Message._FLOAT_BITS
+
+    def __init__(self, duration=600, entities=32, event_rate=0.05, clients=2, seed=None):
+        if not 0 <= entities <= self.MAX_ENTITIES:
+            raise ValueError('Entities out of range (0-{})'.format(self.MAX_ENTITIES), entities)
+        self.duration = duration
+        self.entities = entities
+        self.event_rate = event_rate
+        self.clients = clients
+        self.seed = seed
+        self._entity_events = Aftershock.entity_types.index('ET_EVENTS')
+        self._event_count = len(Aftershock.events)
+
+    def get_message_count(self):
+        return 1 + self.duration * 1000 // self.SNAPSHOT_MSEC
+
+    def write(self, demo_file):
+        """
+        Writes the demo blocks to a binary file. Messages are generated while writing.
+        """
+        with DemoWriter(demo_file) as demo_writer:
+            for msg_seq, msg_bytes in self.iter_messages():
+                demo_writer.write(msg_seq, msg_bytes)
+        demo_file.write(struct.pack('<ii', -1, -1))  # end of demo
+
+    def iter_messages(self):
+        """
+        Yields (message sequence, message bytes) of each demo block.
+        """
+        rnd = random.Random(self.seed)
+        yield 0, self._game_state(rnd)
+
+        active = set()  # entity numbers in last snapshot
+        server_time = 0
+        for msg_seq in range(1, self.get_message_count()):
+            server_time += self.SNAPSHOT_MSEC
+            msg = Message(bitarray())
+            msg.write_bits(0, 32)  # reliable_ack
+            if server_time % self.SCORES_MSEC == 0:
+                self._write_scores(msg, rnd, msg_seq)
+            self._write_snapshot(msg, rnd, server_time, msg_seq > 1, active)
+            msg.write_bits(self._ServerCommand.EOF.value, 8)
+            msg.fill()
+            yield msg_seq, msg.get_message_bytes()
+
+    def _game_state(self, rnd):
+        msg = Message(bitarray())
+        msg.write_bits(0, 32)  # reliable_ack
+        msg.write_bits(self._ServerCommand.GAME_STATE.value, 8)
+        msg.write_bits(0, 32)  # server cmd sequence
+        server_info = {
+            'protocol': 71,
+            'fs_game': 'aftershock',
+            'g_gametype': 1 if self.clients == 2 else 0,
+            'mapname': rnd.choice(('aerowalk', 'ztn3tourney1', 'pro-q3dm6', 'hub3aeroq3a')),
+            'sv_hostname': '^1synthetic ^7demo',
+            'g_timestamp': '2024-04-21 12:00:00',
+        }
+        self._write_config_string(
+            msg, 0, ''.join('\\{}\\{}'.format(key, value) for key, value in server_info.items())
+        )
+        for client in range(self.clients):
+            self._write_config_string(
+                msg, self._CLIENT_CONFIG_STRING + client, 'n\\player{}\\t\\0'.format(client)
+            )
+        msg.write_bits(self._ServerCommand.EOF.value, 8)
+        msg.write_bits(0, 32)  # client num
+        msg.write_bits(rnd.getrandbits(32), 32)  # checksum feed
+        msg.write_bits(self._ServerCommand.EOF.value, 8)
+        msg.fill()
+        return msg.get_message_bytes()
+
+    def _write_config_string(self, msg, index, config_string):
+        msg.write_bits(self._ServerCommand.CONFIG_STRING.value, 8)
+        msg.write_bits(index, 16)
+        self._write_string(msg, config_string)
+
+    @staticmethod
+    def _write_string(msg, string):
+        for char in string.encode():
+            msg.write_bits(char, 8)
+        msg.write_bits(0, 8)
+
+    def _write_scores(self, msg, rnd, command_sequence):
+        """
+        cgame/cg_servercmds.c CG_ParseScores, Aftershock score list
+        """
+        data_count = Aftershock.score_duel_count if self.clients == 2 else Aftershock.score_count
+        scores = [self.clients, 0, 0, 0]
+        for client in range(self.clients):
+            client_scores = [rnd.randrange(100) for _ in range(data_count)]
+            client_scores[0] = client
+            scores += client_scores
+        msg.write_bits(self._ServerCommand.CMD_STRING.value, 8)
+        msg.write_bits(command_sequence, 32)
+        self._write_string(msg, 'scores ' + ' '.join(str(score) for score in scores))
+
+    def _write_snapshot(self, msg, rnd, server_time, delta, active):
+        """
+        client/cl_parse.c: CL_ParseSnapshot. Delta snapshots are delta from previous message.
+        """
+        msg.write_bits(self._ServerCommand.SNAPSHOT.value, 8)
+        msg.write_bits(server_time, 32)
+        msg.write_bits(1 if delta else 0, 8)  # delta number
+        msg.write_bits(0, 8)  # snap flags
+        msg.write_bits(1, 8)  # area bytes
+        msg.write_bits(0, 8)  # area mask
+
+        player_state = {
+            'commandTime': server_time - rnd.randrange(self.SNAPSHOT_MSEC),
+            'origin[0]': rnd.uniform(-2048, 2048),
+            'origin[1]': rnd.randrange(-2048, 2048),
+            'velocity[0]': rnd.randrange(-320, 320),
+            'viewangles[1]': rnd.uniform(0, 360),
+        }
+        if rnd.random() < self.event_rate:
+            player_state['events[0]'] = self._entity_events + rnd.randrange(self._event_count)
+            player_state['externalEvent'] = rnd.randrange(1 << 10)
+        self._write_delta(msg, Aftershock.player_schema, player_state)
+
+        if server_time % 1000 == 0:
+            msg.write_bits(1, 1)  # stats
+            msg.write_bits(1, 1)  # STAT group
+            msg.write_bits(0b11001, 16)  # health, weapons, armor
+            for _ in range(3):
+                msg.write_bits(rnd.randrange(-100, 200), 16)
+            msg.write_bits(0, 3)  # PERS, AMMO, POWERUPS groups
+        else:
+            msg.write_bits(0, 1)  # no stats
+
+        self._write_entities(msg, rnd, server_time, delta, active)
+
+    def _write_entities(self, msg, rnd, server_time, delta, active):
+        """
+        client/cl_parse.c: CL_ParsePacketEntities. Entity numbers are written in order.
+        """
+        if not delta:
+            active.clear()
+        removed = set()
+        for entity_number in active:
+            if rnd.random() < 1 / (self.entities + 1):
+                removed.add(entity_number)
+        added = set()
+        while len(active) - len(removed) + len(added) < self.entities:
+            entity_number = rnd.randint(self.FIRST_ENTITY, self.MAX_ENTITY)
+            if entity_number not in active:
+                added.add(entity_number)
+
+        for entity_number in sorted(active | added):
+            if entity_number in removed:
+                msg.write_bits(entity_number, self._ENTITY_NUM_BITS)
+                msg.write_bits(1, 1)  # remove
+                active.remove(entity_number)
+                continue
+            if entity_number in active and rnd.random() < 0.5:
+                continue  # not changed
+
+            entity_state = {
+                'pos.trTime': server_time,
+                'pos.trBase[0]': rnd.uniform(-4096, 4096),
+                'pos.trBase[1]': rnd.randrange(-4096, 4096),
+                'pos.trDelta[2]': rnd.randrange(-800, 800),
+            }
+            if entity_number in added:
+                entity_state['eType'] = rnd.randrange(self._entity_events)
+                entity_state['modelindex'] = rnd.randrange(64)
+            if rnd.random() < self.event_rate:
+                if rnd.random() < 0.5:
+                    entity_state['eType'] = self._entity_events + rnd.randrange(self._event_count)
+                else:
+                    entity_state['event'] = rnd.randrange(4) << 8 | rnd.randrange(
+                        self._event_count
+                    )
+                    entity_state['eventParm'] = rnd.randrange(256)
+            msg.write_bits(entity_number, self._ENTITY_NUM_BITS)
+            msg.write_bits(0, 1)  # not removed
+            msg.write_bits(1, 1)  # delta
+            self._write_delta(msg, Aftershock.entity_schema, entity_state, True)
+            active.add(entity_number)
+        msg.write_bits((1 << self._ENTITY_NUM_BITS) - 1, self._ENTITY_NUM_BITS)  # end
+
+    def _write_delta(self, msg, schema, state, check_null=False):
+        """
+        qcommon/msg.c MSG_WriteDeltaEntity, MSG_WriteDeltaPlayerstate
+        Writes changed fields up to the last changed field. Signed values are masked to the
+        field bit size.
+        """
+        field_ids = [schema.ids[name] for name in state]
+        field_count = max(field_ids) + 1 if field_ids else 0
+        msg.write_bits(field_count, 8)
+        for field_id in range(field_count):
+            name = schema.names[field_id]
+            if name not in state:
+                msg.write_bits(0, 1)  # not changed
+                continue
+            msg.write_bits(1, 1)
+            if check_null:
+                msg.write_bits(1, 1)  # not null
+            value = state[name]
+            if bit_size := schema.bit_sizes[field_id]:
+                msg.write_bits(int(value), abs(bit_size))
+            elif value == int(value) and abs(value) < 1 << (self._FLOAT_BITS - 1):
+                msg.write_bits(0, 1)  # integral float
+                msg.write_bits(int(value) + (1 << (self._FLOAT_BITS - 1)), self._FLOAT_BITS)
+            else:
+                msg.write_bits(1, 1)
+                msg.write_bits(struct.unpack('>L', struct.pack('>f', value))[0], 32)
+
+
+def main():
+    parser = ArgumentParser(description='Generate a synthetic Aftershock demo.')
+    parser.add_argument('demo', help='Output demo (.dm_71)')
+    parser.add_argument('-d', '--duration', type=int, default=600, help='Seconds of game time')
+    parser.add_argument('-e', '--entities', type=int, default=32, help='Entities per snapshot')
+    parser.add_argument('-r', '--event-rate', type=float, default=0.05, help='Event probability')
+    parser.add_argument('-c', '--clients', type=int, default=2, help='Number of clients')
+    parser.add_argument('-s', '--seed', type=int, help='Random seed')
+    args = parser.parse_args()
+
+    try:
+        generator = DemoGenerator(
+            args.duration, args.entities, args.event_rate, args.clients, args.seed
+        )
+    except ValueError as e:
+        parser.error(e.args[0])
+    with open(args.demo, 'wb') as demo_file:
+        generator.write(demo_file)
+
+
+if __name__ == '__main__':
+    main()
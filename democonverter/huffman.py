@@ -1,15 +1,20 @@
-from bitarray import bitarray, decodetree, util
+from types import MappingProxyType
+
+from bitarray import bitarray, decodetree, frozenbitarray, util
 
 
 class Huffman:
     """
     qcommon/huffman_static.c
     Encode numbers and 256 ASCII symbols with Huffman coding.
+
+    Code tables are built by the first instance, once per process, and shared read-only by
+    all instances.
     """
 
     _MAX_CODE_LENGTH = 11
 
-    _q3_encoder_table = [
+    _q3_encoder_table = (
         34,
         437,
         1159,
@@ -266,17 +271,45 @@ class Huffman:
         10458,
         759,
         582,
-    ]
+    )
 
-    _encoder_table = {}
-    _decoder_tree = None
+    _tables = None  # (encoder table, decoder tree, decoder table)
 
     def __init__(self):
-        for symbol, code in enumerate(self._q3_encoder_table):
+        self._encoder_table, self._decoder_tree, self._decoder_table = self.get_tables()
+
+    @classmethod
+    def get_tables(cls):
+        if Huffman._tables is None:
+            Huffman._tables = cls._build_tables()
+        return Huffman._tables
+
+    @classmethod
+    def _build_tables(cls):
+        encoder_table = {}
+        for symbol, code in enumerate(cls._q3_encoder_table):
             code = util.int2ba(code >> 4, code % 16)
             code.reverse()
-            self._encoder_table[symbol] = code
-        self._decoder_tree = decodetree(self._encoder_table)
+            encoder_table[symbol] = frozenbitarray(code)
+        decoder_tree = decodetree(encoder_table)
+        decoder_table = cls._build_decoder_table(encoder_table, decoder_tree)
+        return MappingProxyType(encoder_table), decoder_tree, decoder_table
+
+    @classmethod
+    def _build_decoder_table(cls, encoder_table, decoder_tree):
+        """
+        Map every possible code window of max code length to (symbol, code length).
+        The only window without a valid code (256) is left as None.
+        """
+        decoder_table = []
+        for window in range(pow(2, cls._MAX_CODE_LENGTH)):
+            code = util.int2ba(window, cls._MAX_CODE_LENGTH, endian='little')
+            try:
+                symbol = next(code.iterdecode(decoder_tree))
+                decoder_table.append((symbol, len(encoder_table[symbol])))
+            except ValueError:
+                decoder_table.append(None)
+        return tuple(decoder_table)
 
     def encode(self, symbol):
         if isinstance(symbol, bitarray):
@@ -297,14 +330,40 @@ class Huffman:
         except StopIteration:
             return 0, 11
 
+    def decode_at(self, data, offset):
+        """
+        Same as decode(data[offset:]), but only the code window at the bit offset is copied
+        instead of the whole data tail.
+        """
+        window = data[offset : offset + self._MAX_CODE_LENGTH]
+        try:
+            symbol = next(window.iterdecode(self._decoder_tree))
+            return symbol, len(self._encoder_table[symbol])
+        except ValueError as e:
+            if util.ba2int(window) == 256 and not data.count(1, offset + len(window)):
+                return 0, 11
+            raise ValueError('Decoding failed:', e)
+        except StopIteration:
+            return 0, 11
+
+    def decode_window(self, data, offset):
+        """
+        Same as decode_at for little endian data, with a single decoder table lookup of the code
+        window instead of walking the decode tree. Windows shorter than max code length (end of
+        data) and the invalid window fall back to decode_at.
+        """
+        window = data[offset : offset + self._MAX_CODE_LENGTH]
+        if len(window) == self._MAX_CODE_LENGTH:
+            if decoded := self._decoder_table[int.from_bytes(window.tobytes(), 'little')]:
+                return decoded
+        return self.decode_at(data, offset)
+
     def __str__(self):
         table = '\nsym\tasc\tcode\tcode_binary\n'
         for symbol, code in self._encoder_table.items():
             # in game first 32 symbols are drawn
             symbol_ascii = chr(symbol) if 32 < symbol < 127 else '.'
-            code_binary = code.to01()
-            code.reverse()
             table += '{0:>3d}\t{1:>3s}\t{2:>4d}\t{3:<11s}\n'.format(
-                symbol, symbol_ascii, util.ba2int(code), code_binary
+                symbol, symbol_ascii, util.ba2int(code[::-1]), code.to01()
             )
         return table
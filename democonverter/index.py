@@ -0,0 +1,122 @@
+import os
+import pathlib
+import sqlite3
+
+from tabulate import tabulate
+
+
+class DemoIndex:
+    """
+    SQLite index of demo info (protocol, mod, date, server, game type, map and clients with
+    scores), filled when demos are read or converted. Demos can be found by map, player, date
+    or game type without reading them again.
+    """
+
+    def __init__(self, index_filename):
+        self._connection = sqlite3.connect(str(index_filename), 30)
+        with self._connection:
+            self._connection.executescript(
+                'CREATE TABLE IF NOT EXISTS demos ('
+                'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, protocol INTEGER, '
+                'mod TEXT, date TEXT, server TEXT, game_type TEXT, map TEXT);'
+                'CREATE TABLE IF NOT EXISTS clients ('
+                'path TEXT REFERENCES demos ON DELETE CASCADE, client INTEGER, name TEXT, '
+                'score INTEGER, PRIMARY KEY (path, client));'
+                'CREATE INDEX IF NOT EXISTS demos_map ON demos (map);'
+                'CREATE INDEX IF NOT EXISTS demos_date ON demos (date);'
+                'CREATE INDEX IF NOT EXISTS clients_name ON clients (name);'
+            )
+        self._connection.execute('PRAGMA foreign_keys = ON')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def add(self, demo_filename, demo):
+        """
+        Adds or replaces the info of a read demo, with the clients shown in demo info.
+        """
+        demo_path = str(pathlib.Path(demo_filename).resolve())
+        stat = os.stat(demo_filename)
+        game_type = demo.game_type.name.lower() if demo.game_type is not None else None
+        with self._connection:
+            self._connection.execute('DELETE FROM demos WHERE path = ?', (demo_path,))
+            self._connection.execute(
+                'INSERT INTO demos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    demo_path,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    demo.protocol,
+                    demo.mod,
+                    str(demo.date) if demo.date else None,
+                    demo.host_name,
+                    game_type,
+                    demo.map,
+                ),
+            )
+            self._connection.executemany(
+                'INSERT INTO clients VALUES (?, ?, ?, ?)',
+                [
+                    (demo_path, client, stats[0], stats[1])
+                    for client, stats in demo.get_scored_clients().items()
+                ],
+            )
+
+    def find(self, map_name=None, player=None, date=None, game_type=None):
+        """
+        Returns info dicts of demos matching all given fields. Player name and date match if
+        they contain the given text.
+        """
+        conditions = []
+        parameters = []
+        if map_name:
+            conditions.append('map = ?')
+            parameters.append(map_name)
+        if game_type:
+            conditions.append('game_type = ?')
+            parameters.append(game_type.lower())
+        if date:
+            conditions.append("date LIKE '%' || ? || '%'")
+            parameters.append(date)
+        if player:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM clients WHERE clients.path = demos.path "
+                "AND name LIKE '%' || ? || '%')"
+            )
+            parameters.append(player)
+
+        query = 'SELECT * FROM demos'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        cursor = self._connection.execute(query + ' ORDER BY date, path', parameters)
+        columns = [column[0] for column in cursor.description]
+        demos = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for demo in demos:
+            demo['clients'] = self._connection.execute(
+                'SELECT name, score FROM clients WHERE path = ? ORDER BY client', (demo['path'],)
+            ).fetchall()
+        return demos
+
+    @staticmethod
+    def table(demos):
+        rows = [
+            [
+                demo['path'],
+                demo['date'],
+                demo['map'],
+                demo['game_type'],
+                demo['server'],
+                ', '.join(
+                    name if score is None else '{} ({})'.format(name, score)
+                    for name, score in demo['clients']
+                ),
+            ]
+            for demo in demos
+        ]
+        return tabulate(rows, headers=['demo', 'date', 'map', 'game type', 'server', 'players'])
@@ -1,6 +1,6 @@
 from struct import pack, unpack
 
-from bitarray import bitarray, util
+from bitarray import bitarray, frozenbitarray, util
 
 from democonverter.huffman import Huffman
 
@@ -13,33 +13,79 @@ class Message:
 
     By default, each message is Huffman encoded, except numbers with non-byte size,
     where the offset is not encoded.
+
+    In convert mode the data is only read. Rewritten values go to a separate output, which is
+    built by appending the unchanged input bits and the new codes in one pass.
+    Data from a memoryview is not copied and read-only, so it can only be written in convert
+    mode.
     """
 
     _FLOAT_BITS = 13
-    _huffman = Huffman()
+    _FIELD_BITS_MAX = 3 + 4 * 11  # changed, null and float bit + 4 longest codes
+    _huffman = None  # created by the first message, so importing does not build the tables
+    # raw little endian codes of values with less than 8 bits: [bit count][value]
+    _raw_codes = tuple(
+        tuple(
+            frozenbitarray(util.int2ba(value, count, endian='little'))
+            for value in range(1 << count)
+        )
+        for count in range(1, 8)
+    )
 
-    def __init__(self, data):
-        self.player_state_delta = {}  # one player state
-        self.entity_state_deltas = []  # multiple packet entities
+    def __init__(self, data, convert=False):
+        if Message._huffman is None:
+            Message._huffman = Huffman()
+        self.server_time = None  # snapshot
+        # set by Parser.store_delta, None without stored deltas
+        self.player_state_delta = None  # one player state
+        self.entity_state_deltas = None  # multiple packet entities
         self.index = 0
 
+        self._input = None  # input bytes, output of unchanged messages in convert mode
         if isinstance(data, bitarray):
             self._data = bitarray(data, endian='little')
+        elif isinstance(data, memoryview):
+            self._data = bitarray(buffer=data, endian='little')
+            self._input = data
         else:
             self._data = bitarray(endian='little')
             self._data.frombytes(data)
+            self._input = data
+
+        self._convert = convert
+        self._output = bitarray(endian='little') if convert else None
+        self._output_offset = 0  # input bits until this offset are in output
+        self._last_write = None  # (input offset, output offset) of last written code
 
     def get_message_bytes(self):
-        return self._data.tobytes()
+        """
+        In convert mode the output message, complete after fill. Messages that were not changed
+        return the input bytes (or memoryview) without encoding.
+        """
+        if self._is_unchanged():
+            return self._input
+        return (self._output if self._convert else self._data).tobytes()
 
     def get_size_bits(self):
+        """
+        Size of the read data.
+        """
         return len(self._data)
 
     def get_size(self):
-        return int(self.get_size_bits() / 8)
+        if self._is_unchanged():
+            return len(self._input)
+        return int(len(self._output if self._convert else self._data) / 8)
 
     def fill(self):
-        self._data.fill()
+        if self._is_unchanged():
+            return
+        if self._convert:
+            self._output += self._data[self._output_offset :]
+            self._output_offset = len(self._data)
+            self._output.fill()
+        else:
+            self._data.fill()
 
     def read_bits(self, count, offset=None, signed=False):
         """
@@ -58,37 +104,161 @@ class Message:
             value_bytes = self._data[offset : offset + bit_offset]
             value = util.ba2int(value_bytes)
             offset += bit_offset
-        for i in range(int(count / 8)):
-            decoded_value, size = self._huffman.decode(self._data[offset:])
-            value += decoded_value * pow(2, (8 * i) + bit_offset)
+        for i in range(count >> 3):
+            decoded_value, size = self._huffman.decode_window(self._data, offset)
+            value |= decoded_value << ((8 * i) + bit_offset)
             offset += size
         self.index = offset
 
-        if signed:
-            value = util.ba2int(util.int2ba(value, count), True)
+        if signed and value >> (count - 1):
+            value -= 1 << count
         return value
 
-    def write_bits(self, value, count, offset=None):
-        if isinstance(value, int):
-            value = util.int2ba(value)
-        value.reverse()
+    def read_many(self, bit_sizes, check_null=False, rewrites=None, field_count=None):
+        """
+        qcommon/msg.c MSG_ReadDeltaEntity, MSG_ReadDeltaPlayerstate
+        Reads a delta field list in one pass. Each field has a changed bit, a null bit for
+        entities (check_null) and the value: int for non-zero bit size (negative if signed)
+        or float. Returns list of field values, None if field was not changed.
+        Only the first field_count fields are read, if set.
 
-        # calculate code
-        code = bitarray()
-        if bit_offset := count % 8:
-            code += value[:bit_offset]
-        for index in range(int(count / 8)):
-            bit_start = 8 * index + bit_offset
-            symbol = value[bit_start : bit_start + 8]
-            symbol.reverse()
-            code += self._huffman.encode(symbol if symbol != bitarray() else 0)
-
-        # write to msg
+        rewrites is indexed like bit_sizes, each a value table or None for fields that are never
+        rewritten. A read unsigned int field is rewritten with write_bits to table[value],
+        unless it is None.
+        """
+        data = self._data
+        decoder_table = self._huffman._decoder_table
+        decode_at = self._huffman.decode_at
+        size = len(data)
+        offset = self.index
+        values = []
+        for index in range(len(bit_sizes) if field_count is None else field_count):
+            bit_size = bit_sizes[index]
+            if offset + self._FIELD_BITS_MAX > size:
+                # end of message, read with the same edge cases as single reads
+                self.index = offset
+                values.append(self._read_field(bit_size, check_null, rewrites and rewrites[index]))
+                offset = self.index
+                size = len(data)
+                continue
+
+            if not data[offset]:  # not changed
+                values.append(None)
+                offset += 1
+                continue
+            offset += 1
+            if check_null:
+                offset += 1
+                if not data[offset - 1]:
+                    values.append(0)
+                    continue
+
+            if bit_size:
+                count = -bit_size if bit_size < 0 else bit_size
+                start = offset
+            elif data[offset]:  # full float
+                count = 32
+                offset += 1
+            else:  # integral float
+                count = self._FLOAT_BITS
+                offset += 1
+
+            value = 0
+            if bit_offset := count & 7:
+                value = int.from_bytes(data[offset : offset + bit_offset].tobytes(), 'little')
+                offset += bit_offset
+            for shift in range(bit_offset, count, 8):
+                window = data[offset : offset + 11]
+                decoded = decoder_table[int.from_bytes(window.tobytes(), 'little')]
+                symbol, code_size = decoded if decoded else decode_at(data, offset)
+                value |= symbol << shift
+                offset += code_size
+
+            if not bit_size:
+                if count == 32:
+                    value = unpack('>f', pack('>L', value))[0]
+                else:
+                    value -= 1 << (self._FLOAT_BITS - 1)
+            else:
+                if bit_size < 0 and value >> (count - 1):
+                    value -= 1 << count
+                if (
+                    rewrites
+                    and (table := rewrites[index])
+                    and (new_value := table[value]) is not None
+                ):
+                    self.index = offset
+                    self.write_bits(new_value, count, start)
+                    offset = self.index
+                    size = len(data)
+            values.append(value)
+        self.index = offset
+        return values
+
+    def _read_field(self, bit_size, check_null, rewrite_table=None):
+        if not self.read_boolean():
+            return None
+        if check_null and not self.read_boolean():
+            return 0
+        if not bit_size:
+            return self.read_float()
+        offset = self.index
+        value = self.read_bits(abs(bit_size), signed=bit_size < 0)
+        if rewrite_table and (new_value := rewrite_table[value]) is not None:
+            self.write_bits(new_value, bit_size, offset)
+        return value
+
+    def write_bits(self, value, count, offset=None):
+        """
+        Replaces the value from offset to current index with the encoded value. Without offset,
+        the value is inserted at current index.
+        In convert mode the value is written to output and the index stays at the end of the
+        replaced value. Values must be written in message order, the last written value can be
+        written again. Writing the same code as the input does not change the message.
+        Returns False if the message was not changed.
+        """
+        code = self._encode_bits(value, count)
         if offset is None:
             offset = self.index
-        old_size = self.index - offset
-        self._data[offset : offset + old_size] = code
-        self.index = offset + len(code)
+
+        if not self._convert:
+            old_size = self.index - offset
+            self._data[offset : offset + old_size] = code
+            self.index = offset + len(code)
+            return True
+
+        if self._last_write and self._last_write[0] == offset:
+            del self._output[self._last_write[1] :]
+        elif offset < self._output_offset:
+            raise ValueError('Cannot write before offset', offset, self._output_offset)
+        elif self._data[offset : self.index] == code:
+            return False  # same code as input
+        else:
+            self._output += self._data[self._output_offset : offset]
+            self._last_write = offset, len(self._output)
+        self._output += code
+        self._output_offset = self.index
+        return True
+
+    def _is_unchanged(self):
+        """
+        Convert mode message with nothing written, the output is the input.
+        """
+        return self._convert and self._last_write is None and self._input is not None
+
+    def _encode_bits(self, value, count):
+        if isinstance(value, bitarray):
+            value = util.ba2int(value)
+        value &= (1 << count) - 1
+
+        code = bitarray(endian='little')
+        if bit_offset := count % 8:
+            code += self._raw_codes[bit_offset - 1][value & ((1 << bit_offset) - 1)]
+            value >>= bit_offset
+        for _ in range(count >> 3):
+            code += self._huffman.encode(value & 0xFF)
+            value >>= 8
+        return code
 
     def read_boolean(self):
         return self.read_bits(1)
@@ -107,7 +277,7 @@ class Message:
             value_bytes = pack('>L', self.read_long())  # convert to bytes
             return unpack('>f', value_bytes)[0]  # convert to float
         else:  # integral
-            return self.read_bits(self._FLOAT_BITS) - pow(2, self._FLOAT_BITS - 1)
+            return self.read_bits(self._FLOAT_BITS) - (1 << (self._FLOAT_BITS - 1))
 
     def read_string(self, max_chars=1024):
         string_array = []
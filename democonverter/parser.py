@@ -8,6 +8,8 @@ from democonverter.converter import Converter
 from democonverter.protocol.aftershock import Aftershock
 from democonverter.protocol.quake3 import Quake3
 from democonverter.protocol.quakelive import QuakeLive
+from democonverter.protocol.schema import StateRecord
+from democonverter.snapshot import SnapshotStates
 
 
 def sanitize_string(value):
@@ -26,24 +28,50 @@ class Parser:
 
     Since messages are encoded, and some non-byte length numbers are not, we read the message data
     sequentially and cannot fast-forward.
+    Snapshot is the last command of a message, so when snapshots are not needed (demo info) the
+    rest of the message is skipped at the snapshot.
+    With track_states, full player and entity states of each snapshot are kept in states.
+    Deltas are only collected when there is a delta_sink, which is called with (message, entity
+    number (None for player state), StateRecord of changed field values).
     """
 
     _BIG_INFO_STRING = 8192
     _CONFIG_STRING_SEQUENCE_MAX = 1024
     _ENTITY_NUM_BITS = 10
-    _converter = Converter(Aftershock, Quake3)  # only implemented conversion
-
-    def __init__(self, demo, convert=False):
+    _CONVERT_PROTOCOL = Quake3  # protocol demos are converted to
+
+    def __init__(
+        self,
+        demo,
+        convert=False,
+        snapshots=True,
+        track_states=False,
+        delta_sink=None,
+        snapshot_times=False,
+    ):
+        """
+        Without snapshots, messages are parsed until the snapshot, with snapshot times only its
+        server time is read.
+        """
         self._demo = demo
         self._convert = convert
+        self._snapshots = snapshots or convert
+        self._snapshot_times = snapshot_times
+        self._track_states = track_states
+        self._delta_sink = delta_sink
+        self._converter = None  # set from demo protocol
+        self.states = None
+        self._msg_seq = None
         self._abort = False
         self._msg = None
 
-    def parse_message(self, msg):
+    def parse_message(self, msg, msg_seq=None):
         """
         client/cl_parse.c CL_ParseServerMessage
+        Message sequence is needed for snapshot deltas when tracking states.
         """
         self._msg = msg
+        self._msg_seq = msg_seq
         self._msg.read_long()  # reliable_ack
 
         score = None
@@ -57,6 +85,10 @@ class Parser:
             if server_cmd == self._ServerCommand.GAME_STATE.value:
                 self._parse_game_state()
             elif server_cmd == self._ServerCommand.SNAPSHOT.value:
+                if not self._snapshots:
+                    if self._snapshot_times:
+                        self._msg.server_time = self._msg.read_long()  # command time
+                    break
                 self._parse_snapshot()
             elif server_cmd == self._ServerCommand.CMD_STRING.value:
 
@@ -142,7 +174,7 @@ class Parser:
                             sanitize_string(client_name)
                         ]
             elif server_cmd == self._ServerCommand.BASE_LINE.value:
-                self._read_delta_entity()
+                self._read_delta_entity(baseline=True)
         self._msg.read_long()  # client num
         self._msg.read_long()  # checksum feed
 
@@ -150,14 +182,16 @@ class Parser:
         """
         client/cl_parse.c: CL_ParseSnapshot
         """
-        self._msg.read_long()  # command time
-        self._msg.read_byte()  # delta number
-        self._msg.read_byte()  # snap flags
+        self._msg.server_time = self._msg.read_long()  # command time
+        delta_num = self._msg.read_byte()  # delta number
+        snap_flags = self._msg.read_byte()  # snap flags
         area_bytes = self._msg.read_byte()
         self._msg.read_byte()  # area mask
         for i in range(area_bytes - 1):
             self._msg.read_byte()
 
+        if self.states:
+            self.states.begin_snapshot(self._msg_seq, self._msg.server_time, delta_num, snap_flags)
         self._parse_player_state()
         self._parse_stats()
 
@@ -165,25 +199,31 @@ class Parser:
         while True:
             if self._read_delta_entity():
                 break
+        if self.states:
+            self.states.end_snapshot()
 
     def _parse_player_state(self):
         """
         qcommon/msg.c: MSG_ReadDeltaPlayerstate
         """
         field_count = self._msg.read_byte()
-        player_states = self._demo.game_protocol.player_states
-        if field_count > len(player_states):
+        player_schema = self._demo.game_protocol.player_schema
+        if field_count > len(player_schema):
             raise ValueError(
-                'Invalid player state field count {} > {}'.format(field_count, len(player_states))
+                'Invalid player state field count {} > {}'.format(field_count, len(player_schema))
             )
-        self._msg.player_state_delta = self._read_delta(player_states, field_count)
+        values = self._read_delta(player_schema, field_count)
+        if self._delta_sink:
+            self._delta_sink(self._msg, None, StateRecord(player_schema, values))
+        if self.states:
+            self.states.delta_player_state(values)
 
     def _parse_stats(self):
         """
         qcommon/msg.c MSG_ReadDeltaPlayerstate
         """
         if self._msg.read_boolean():  # read stats
-            for stat in ['STAT', 'PERS', 'AMMO', 'POWERUPS']:
+            for group, stat in enumerate(['STAT', 'PERS', 'AMMO', 'POWERUPS']):
                 if self._msg.read_boolean():  # read stats group
                     # print(stat, end=': ')
                     offset = self._msg.index
@@ -199,6 +239,8 @@ class Parser:
                                 # print(self._demo.game_protocol.StatsPowerup(i).name, ':', value, end=' ')
                             else:
                                 value = self._msg.read_bits(count=16, signed=True)
+                            if self.states:
+                                self.states.set_stat(group, i, value)
                     #             if stat == 'STAT':
                     #                 print(self._demo.game_protocol.Stats(i).name, ':', value, end=' ')
                     #             if stat == 'PERS':
@@ -207,7 +249,7 @@ class Parser:
                     #                 print(self._demo.game_protocol.StatsWeapon(i).name, ':', value, end=' ')
                     # print()
 
-    def _read_delta_entity(self):
+    def _read_delta_entity(self, baseline=False):
         """
         code/qcommon/msg.c: MSG_ReadDeltaEntity
         """
@@ -215,81 +257,51 @@ class Parser:
         if not 0 <= delta_entity_number < pow(2, self._ENTITY_NUM_BITS) - 1:
             return True
         if self._msg.read_boolean():  # remove
+            if self.states and not baseline:
+                self.states.delta_entity(delta_entity_number, None, remove=True)
             return False
         if not self._msg.read_boolean():  # no delta
+            if self.states:
+                self._set_entity_state(delta_entity_number, None, baseline)
             return False
 
         field_count = self._msg.read_byte()
-        entity_states = self._demo.game_protocol.entity_states
-        if field_count > len(entity_states):
+        entity_schema = self._demo.game_protocol.entity_schema
+        if field_count > len(entity_schema):
             raise ValueError(
-                'Invalid entity state field count {} > {}'.format(field_count, len(entity_states))
+                'Invalid entity state field count {} > {}'.format(field_count, len(entity_schema))
             )
 
-        delta = self._read_delta(entity_states, field_count, True)
-        self._msg.entity_state_deltas.append(delta)
-
-    def _read_delta(self, states, field_count, check_null=False):
-        delta = {}
-        for i in range(field_count):
-            if self._msg.read_boolean():  # entity changed
-                entity_state = states[i]
-                if check_null and not self._msg.read_boolean():
-                    value = 0
-                elif entity_state.bit_size:  # int
-                    offset = self._msg.index
-                    value = self._msg.read_bits(
-                        abs(entity_state.bit_size),
-                        signed=True if entity_state.bit_size < 0 else False,
-                    )
-                    if self._convert:
-                        self._convert_events(
-                            entity_state.name, entity_state.bit_size, value, offset
-                        )
-                else:
-                    value = self._msg.read_float()
-                delta[entity_state.name] = value
-        return delta
-
-    def _convert_events(self, field_name, field_size, value, write_offset):
-        """
-        For both player and packet events.
-        Packet entity changes: eType, event
-        Player entity changes: events[0], events[1], externalEvent
-        NOTE: fixes are hardcoded and only make sense for AS=>Q3 conversion
-        """
-        if field_name == 'modelindex' and value == 61:
-            # fix bad item index 61 on entity
-            self._msg.write_bits(0, field_size, write_offset)
-
-        if field_name == 'eType' and value == 101:
-            # fix event 88 EV_THAW_THICK
-            self._msg.write_bits(0, field_size, write_offset)
-
-        # 1:23 2:44
-
-        if field_name == 'eType' and value == 16:
-            # fix event: 14 => 10
-            self._msg.write_bits(14, field_size, write_offset)
-
-        if field_name == 'eType' and value == 29:
-            # fix event: 14 => 10
-            self._msg.write_bits(27, field_size, write_offset)
+        values = self._read_delta(entity_schema, field_count, True)
+        if self._delta_sink:
+            self._delta_sink(self._msg, delta_entity_number, StateRecord(entity_schema, values))
+        if self.states:
+            self._set_entity_state(delta_entity_number, values, baseline)
 
-        if field_name == 'eType' and value == 37:
-            # fix event: 24 => 22
-            self._msg.write_bits(35, field_size, write_offset)
+    def _set_entity_state(self, entity_number, values, baseline):
+        if baseline:
+            self.states.set_baseline(entity_number, values)
+        else:
+            self.states.delta_entity(entity_number, values)
 
-        if field_name == 'eType' and value == 38:
-            # fix event: 25 => 23
-            self._msg.write_bits(36, field_size, write_offset)
+    def _read_delta(self, schema, field_count, check_null=False):
+        """
+        Returns changed field values, None if field was not changed.
+        """
+        rewrites = self._converter.get_rewrites(schema) if self._convert else None
+        return self._msg.read_many(schema.bit_sizes, check_null, rewrites, field_count)
 
-        if field_name in ('eType', 'events[0]', 'events[1]'):
-            if converted_value := self._converter.convert_entity_type_event(value):
-                self._msg.write_bits(converted_value, field_size, write_offset)
-        if field_name in ('event', 'externalEvent'):
-            if converted_value := self._converter.convert_bit_flag_event(value):
-                self._msg.write_bits(converted_value, field_size, write_offset)
+    @staticmethod
+    def store_delta(msg, entity_number, delta):
+        """
+        Delta sink that keeps deltas in message player_state_delta and entity_state_deltas.
+        """
+        if entity_number is None:
+            msg.player_state_delta = delta
+        elif msg.entity_state_deltas is None:
+            msg.entity_state_deltas = [delta]
+        else:
+            msg.entity_state_deltas.append(delta)
 
     def _set_from_protocol(self):
         """
@@ -304,6 +316,19 @@ class Parser:
         else:
             raise ValueError('Unknown demo protocol', self._demo.protocol, self._demo.mod)
 
+        if self._convert:
+            self._converter = Converter.get(self._demo.game_protocol, self._CONVERT_PROTOCOL)
+            if not self._converter:
+                raise ValueError(
+                    'No converter for demo protocol', self._demo.protocol, self._demo.mod
+                )
+
+        if self._track_states:  # new game state
+            self.states = SnapshotStates(
+                len(self._demo.game_protocol.player_schema),
+                len(self._demo.game_protocol.entity_schema),
+            )
+
     def _set_clients(self, cmd):
         first_client_id = 544  # Quake 3 / Aftershock
         if self._demo.game_protocol == QuakeLive:
@@ -0,0 +1,172 @@
+import json
+import time
+from functools import wraps
+
+from tabulate import tabulate
+
+from democonverter.demo import Demo
+from democonverter.message import Message
+from democonverter.parser import Parser
+from democonverter.writer import DemoWriter
+
+
+class Stage:
+    """
+    Call count, time and processed bits, Huffman symbols and bytes of a profiled stage.
+    """
+
+    __slots__ = ('calls', 'seconds', 'bits', 'symbols', 'bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bits = 0
+        self.symbols = 0
+        self.bytes = 0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Profiler:
+    """
+    Per stage counters and timers of demo reading and conversion.
+    Profiled methods are wrapped only while the profiler is used as a context manager and
+    restored after, so there is no overhead without profiling. Stage times are inclusive,
+    e.g. parse message includes read delta.
+
+    Symbols of delta fields are counted from the read values: zero entity fields are counted
+    as null (not encoded), as written by the game. Encoded bits only count writes that change
+    the message, writes of the same code as the input are timed but not counted. Bits read by
+    read_many field by field (at the end of a message) are counted in decode delta fields
+    only, not again in decode bits.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._originals = []
+        self._running = {}  # stage name: calls in progress
+
+    def __enter__(self):
+        self._wrap_iterator(Demo, '_iter_messages', 'demo read', self._count_demo_read)
+        self._wrap(Parser, 'parse_message', 'parse message')
+        self._wrap(Parser, '_parse_snapshot', 'parse snapshot')
+        self._wrap(Parser, '_read_delta', 'read delta')
+        self._wrap(Message, 'read_bits', 'decode bits', self._count_read_bits)
+        self._wrap(Message, 'read_many', 'decode delta fields', self._count_read_many)
+        self._wrap(Message, 'write_bits', 'encode bits', self._count_write_bits)
+        self._wrap(DemoWriter, 'write', 'demo write', self._count_demo_write)
+        self._wrap(DemoWriter, 'flush', 'file write')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for owner, name, function in reversed(self._originals):
+            setattr(owner, name, function)
+        self._originals = []
+
+    def _stage(self, stage_name):
+        return self.stages.setdefault(stage_name, Stage())
+
+    def _wrap(self, owner, name, stage_name, count=None):
+        """
+        count(stage, result, message index before the call, *args, **kwargs) adds processed
+        bits, symbols and bytes of a call, and returns False if the call is not counted.
+        """
+        function = owner.__dict__[name]
+        stage = self._stage(stage_name)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            index = getattr(args[0], 'index', None)  # message read index
+            self._running[stage_name] = self._running.get(stage_name, 0) + 1
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                stage.seconds += time.perf_counter() - start
+                self._running[stage_name] -= 1
+            if not count or count(stage, result, index, *args, **kwargs) is not False:
+                stage.calls += 1
+            return result
+
+        self._originals.append((owner, name, function))
+        setattr(owner, name, wrapper)
+
+    def _wrap_iterator(self, owner, name, stage_name, count=None):
+        """
+        Times each item of a generator method, calls are items. count(stage, item) adds
+        processed bits, symbols and bytes of an item.
+        """
+        function = owner.__dict__[name]
+        stage = self._stage(stage_name)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            iterator = function(*args, **kwargs)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    stage.seconds += time.perf_counter() - start
+                    return
+                stage.seconds += time.perf_counter() - start
+                stage.calls += 1
+                if count:
+                    count(stage, item)
+                yield item
+
+        self._originals.append((owner, name, function))
+        setattr(owner, name, wrapper)
+
+    @staticmethod
+    def _count_demo_read(stage, item):
+        msg_seq, msg = item
+        stage.bytes += msg.get_size_bits() >> 3
+
+    def _count_read_bits(self, stage, result, index, msg, count, offset=None, *args, **kwargs):
+        if self._running.get('decode delta fields'):
+            return False  # counted by read_many
+        stage.bits += msg.index - (index if offset is None else offset)
+        stage.symbols += count >> 3
+
+    @staticmethod
+    def _count_read_many(stage, values, index, msg, bit_sizes, check_null=False, *args, **kwargs):
+        stage.bits += msg.index - index
+        for bit_size, value in zip(bit_sizes, values):
+            if value is None or check_null and value == 0:
+                continue
+            if bit_size:
+                stage.symbols += abs(bit_size) >> 3
+            else:
+                stage.symbols += 4 if isinstance(value, float) else 1  # full or integral float
+
+    @staticmethod
+    def _count_write_bits(stage, written, index, msg, value, count, *args, **kwargs):
+        if not written:
+            return False  # same code as input, not a rewrite
+        stage.bits += count
+        stage.symbols += count >> 3
+
+    @staticmethod
+    def _count_demo_write(stage, result, index, demo_writer, msg_seq, msg_bytes):
+        stage.bytes += len(msg_bytes)
+
+    def to_dict(self):
+        return {stage_name: stage.to_dict() for stage_name, stage in self.stages.items()}
+
+    def report(self, output_format='table'):
+        if output_format == 'json':
+            return json.dumps(self.to_dict(), indent=2)
+        rows = [
+            [
+                stage_name,
+                stage.calls,
+                round(stage.seconds * 1000, 1),
+                stage.bits,
+                stage.symbols,
+                stage.bytes,
+            ]
+            for stage_name, stage in self.stages.items()
+        ]
+        return tabulate(rows, headers=['stage', 'calls', 'ms', 'bits', 'symbols', 'bytes'])
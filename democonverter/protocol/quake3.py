@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from democonverter.protocol.schema import Schema
+
 
 class Quake3:
     """
@@ -218,3 +220,6 @@ class Quake3:
         State('jumppad_ent', 10),
         State('loopSound', 16),
     ]
+
+    entity_schema = Schema(entity_states)
+    player_schema = Schema(player_states)
@@ -3,6 +3,7 @@ from enum import Enum, auto
 from tabulate import tabulate
 
 from democonverter.protocol.quake3 import Quake3
+from democonverter.protocol.schema import Schema
 
 
 class QuakeLive(Quake3):
@@ -164,6 +165,9 @@ class QuakeLive(Quake3):
 
     player_states = _set_player_states()
 
+    entity_schema = Schema(entity_states)
+    player_schema = Schema(player_states)
+
     class ClientScoreDuel(Enum):
         NAME = 0
         SCORE = auto()
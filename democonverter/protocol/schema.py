@@ -0,0 +1,70 @@
+from array import array
+
+
+class Schema:
+    """
+    Protocol state field list (Quake3.State) compiled to parallel arrays indexed by field id,
+    the field position in the delta.
+    Bit sizes keep the State convention: negative is signed int and 0 is float.
+    """
+
+    __slots__ = ('names', 'ids', 'bit_sizes', 'signed', 'floats')
+
+    def __init__(self, states):
+        self.names = tuple(state.name for state in states)
+        self.ids = {name: field_id for field_id, name in enumerate(self.names)}
+        self.bit_sizes = array('b', (state.bit_size for state in states))
+        self.signed = array('B', (state.bit_size < 0 for state in states))
+        self.floats = array('B', (state.bit_size == 0 for state in states))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class StateRecord:
+    """
+    Player or entity state values in schema field order. Values can be read by field id or
+    name, None is a field not changed in a delta.
+    """
+
+    __slots__ = ('schema', 'values')
+
+    def __init__(self, schema, values):
+        self.schema = schema
+        self.values = values
+
+    def __getitem__(self, field):
+        if isinstance(field, str):
+            field = self.schema.ids[field]
+        return self.values[field]
+
+    def get(self, name, default=None):
+        field_id = self.schema.ids.get(name)
+        if field_id is None or field_id >= len(self.values) or self.values[field_id] is None:
+            return default
+        return self.values[field_id]
+
+    def items(self):
+        """
+        (name, value) of set fields.
+        """
+        return (
+            (self.schema.names[field_id], value)
+            for field_id, value in enumerate(self.values)
+            if value is not None
+        )
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, StateRecord):
+            return self.schema is other.schema and list(self.values) == list(other.values)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'StateRecord({})'.format(self.to_dict())
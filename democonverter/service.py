@@ -0,0 +1,88 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from democonverter.demo import Demo
+
+
+def read_demo_bytes(data, convert):
+    """
+    Reads demo data in a worker process. Returns converted demo bytes or demo info.
+    """
+    demo = Demo(data=data)
+    return demo.convert() if convert else demo.info()
+
+
+class DemoService:
+    """
+    Asyncio front end for reading demos in a process pool.
+    Submitted demos wait in a bounded queue, submit waits while the queue is full
+    (backpressure). Each result is a future of the converted demo bytes or the demo info.
+
+        async with DemoService(jobs=4) as service:
+            converted = await service.convert(data)
+    """
+
+    QUEUE_SIZE = 64
+
+    def __init__(self, jobs=None, queue_size=QUEUE_SIZE):
+        self.jobs = jobs or os.cpu_count()
+        self._queue = asyncio.Queue(queue_size)
+        self._executor = None
+        self._workers = []
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(self.jobs)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.jobs)]
+
+    async def stop(self):
+        """
+        Waits for queued demos, then stops the workers and the process pool.
+        """
+        await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._executor.shutdown()
+        self._executor = None
+
+    async def submit(self, data, convert=True):
+        """
+        Queues demo bytes, bytes-like or an asyncio stream (read to the end) and returns the
+        future of the result. Waits while the queue is full.
+        """
+        if not self._workers:
+            raise RuntimeError('Demo service is not running')
+        if isinstance(data, asyncio.StreamReader):
+            data = await data.read()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((bytes(data), convert, future))
+        return future
+
+    async def convert(self, data):
+        return await (await self.submit(data, True))
+
+    async def info(self, data):
+        return await (await self.submit(data, False))
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            data, convert, future = await self._queue.get()
+            try:
+                result = await loop.run_in_executor(self._executor, read_demo_bytes, data, convert)
+                if not future.cancelled():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,137 @@
+class Snapshot:
+    """
+    client/client.h clSnapshot_t
+    Full player and entity states of a server frame. States are tuples of field values in
+    protocol state order, unchanged states are shared with the snapshot they were delta from.
+    """
+
+    __slots__ = (
+        'message_num',
+        'server_time',
+        'delta_num',
+        'snap_flags',
+        'valid',
+        'player_state',
+        'stats',
+        'entities',
+    )
+
+    def __init__(self, message_num, server_time, delta_num, snap_flags):
+        self.message_num = message_num
+        self.server_time = server_time
+        self.delta_num = delta_num  # message number of delta snapshot, None if not delta
+        self.snap_flags = snap_flags
+        self.valid = False
+        self.player_state = None
+        self.stats = None  # stats, persistant, ammo, powerups
+        self.entities = {}  # entity number: entity state
+
+
+class SnapshotStates:
+    """
+    client/cl_parse.c CL_ParseSnapshot, CL_ParsePacketEntities
+    Applies snapshot deltas to the entity baselines and the snapshot they are delta from.
+    Keeps the last PACKET_BACKUP snapshots, which snapshots can be delta from.
+    """
+
+    PACKET_BACKUP = 32
+    _STATS_GROUPS = 4
+    _STATS_COUNT = 16
+
+    def __init__(self, player_state_count, entity_state_count):
+        self._null_player_state = (0,) * player_state_count
+        self._null_entity_state = (0,) * entity_state_count
+        self._null_stats = ((0,) * self._STATS_COUNT,) * self._STATS_GROUPS
+        self.baselines = {}
+        self.snapshots = [None] * self.PACKET_BACKUP
+        self.snapshot = None  # last parsed snapshot
+
+        self._old_entities = []  # (entity number, entity state) of delta snapshot
+        self._old_entity_index = 0
+        self._stats = None
+
+    def set_baseline(self, entity_number, values):
+        """
+        Baseline entity is delta from null entity. Values None is no delta.
+        """
+        self.baselines[entity_number] = self._apply(self._null_entity_state, values)
+
+    def begin_snapshot(self, message_num, server_time, delta_num, snap_flags):
+        snapshot = Snapshot(message_num, server_time, None, snap_flags)
+        old_snapshot = None
+        if delta_num:
+            snapshot.delta_num = message_num - delta_num
+            old_snapshot = self.snapshots[snapshot.delta_num % self.PACKET_BACKUP]
+            if old_snapshot and old_snapshot.message_num != snapshot.delta_num:
+                old_snapshot = None  # delta snapshot too old
+            snapshot.valid = old_snapshot is not None
+        else:
+            snapshot.valid = True
+
+        if old_snapshot:
+            snapshot.player_state = old_snapshot.player_state
+            self._stats = list(old_snapshot.stats)
+            self._old_entities = sorted(old_snapshot.entities.items())
+        else:
+            snapshot.player_state = self._null_player_state
+            self._stats = list(self._null_stats)
+            self._old_entities = []
+        self._old_entity_index = 0
+        self.snapshot = snapshot
+
+    def delta_player_state(self, values):
+        self.snapshot.player_state = self._apply(self.snapshot.player_state, values)
+
+    def set_stat(self, group, index, value):
+        stats = list(self._stats[group])
+        stats[index] = value
+        self._stats[group] = tuple(stats)
+
+    def delta_entity(self, entity_number, values, remove=False):
+        """
+        Entity changed from delta snapshot or baseline. Values None is no delta.
+        """
+        entity_state = self._copy_old_entities(entity_number)
+        if entity_state is None:
+            entity_state = self.baselines.get(entity_number, self._null_entity_state)
+        if not remove:
+            self.snapshot.entities[entity_number] = self._apply(entity_state, values)
+
+    def end_snapshot(self):
+        """
+        Copies unchanged entities and keeps the snapshot if it is valid.
+        """
+        snapshot = self.snapshot
+        self._copy_old_entities(None)
+        snapshot.stats = tuple(self._stats)
+        self._old_entities = []
+        if snapshot.valid:
+            self.snapshots[snapshot.message_num % self.PACKET_BACKUP] = snapshot
+        return snapshot
+
+    def _copy_old_entities(self, entity_number):
+        """
+        Copies unchanged entities from delta snapshot before the entity number, returns the
+        delta snapshot entity state of the entity number if it exists.
+        """
+        entities = self.snapshot.entities
+        while self._old_entity_index < len(self._old_entities):
+            old_entity_number, old_entity_state = self._old_entities[self._old_entity_index]
+            if entity_number is not None and old_entity_number >= entity_number:
+                if old_entity_number == entity_number:
+                    self._old_entity_index += 1
+                    return old_entity_state
+                return None
+            entities[old_entity_number] = old_entity_state
+            self._old_entity_index += 1
+        return None
+
+    @staticmethod
+    def _apply(state, values):
+        if not values:
+            return state
+        new_state = list(state)
+        for index, value in enumerate(values):
+            if value is not None:
+                new_state[index] = value
+        return tuple(new_state)
@@ -0,0 +1,43 @@
+import struct
+
+
+class DemoWriter:
+    """
+    Writes demo blocks (message sequence, message size, message) to a demo file.
+    Blocks are collected in a reusable buffer that is written in large chunks.
+    """
+
+    BUFFER_SIZE = 1_048_576
+    _HEADER = struct.Struct('<ii')
+
+    def __init__(self, demo_file, buffer_size=BUFFER_SIZE):
+        self._demo_file = demo_file
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def write(self, msg_seq, msg_bytes):
+        msg_size = len(msg_bytes)
+        block_size = self._HEADER.size + msg_size
+        if self._size + block_size > len(self._buffer):
+            self.flush()
+            if block_size > len(self._buffer):
+                self._demo_file.write(self._HEADER.pack(msg_seq, msg_size))
+                self._demo_file.write(msg_bytes)
+                return
+
+        self._HEADER.pack_into(self._buffer, self._size, msg_seq, msg_size)
+        self._size += self._HEADER.size
+        self._view[self._size : self._size + msg_size] = msg_bytes
+        self._size += msg_size
+
+    def flush(self):
+        if self._size:
+            self._demo_file.write(self._view[: self._size])
+            self._size = 0
@@ -1,6 +1,70 @@
+import contextlib
+import io
+import os
+import sys
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support
 
+from democonverter.block_index import BlockIndex
 from democonverter.demo import Demo
+from democonverter.index import DemoIndex
+from democonverter.profiler import Profiler
+
+
+def read_demo(demo, convert, output, profile=None, cache=False, index_filename=None):
+    """
+    Reads demo in a worker process and returns its printed output.
+    """
+    with contextlib.redirect_stdout(io.StringIO()) as demo_output:
+        profile_demo(demo, convert, output, profile, cache, index_filename)
+    return demo_output.getvalue()
+
+
+def profile_demo(demo, convert, output, profile=None, cache=False, index_filename=None):
+    """
+    Reads demo, with profile (table or json) the stage profile is printed after the demo.
+    With index filename, demo info is added to the demo index.
+    """
+    with contextlib.ExitStack() as stack:
+        index = stack.enter_context(DemoIndex(index_filename)) if index_filename else None
+        if not profile:
+            Demo(demo).read(convert, output, cache, index)
+            return
+        with Profiler() as profiler:
+            Demo(demo).read(convert, output, cache, index)
+    print(profiler.report(profile))
+
+
+def index_demo_blocks(demo):
+    """
+    Writes the seekable block index (offsets and server times) next to the demo.
+    """
+    block_index = BlockIndex.build(Demo(demo))
+    block_index.save(demo)
+    print('Indexed {} blocks of demo {} '.format(len(block_index), demo))
+
+
+def read_demos(demos, convert, output, jobs, profile=None, cache=False, index_filename=None):
+    """
+    Reads demos in a process pool. Demo output is printed in input order, same as with serial
+    reading. Progress and failures are printed to stderr.
+    """
+    failed = 0
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [
+            executor.submit(read_demo, demo, convert, output, profile, cache, index_filename)
+            for demo in demos
+        ]
+        for count, (demo, future) in enumerate(zip(demos, futures), 1):
+            try:
+                print(future.result(), end='', flush=True)
+                status = 'done'
+            except Exception as e:
+                failed += 1
+                status = 'failed: {}'.format(e)
+            print('[{}/{}] {} {}'.format(count, len(demos), demo, status), file=sys.stderr)
+    return failed
 
 
 def main():
@@ -13,15 +77,87 @@ def main():
     )
 
     parser.add_argument('demos', nargs='*', help='Input demo(s)')
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
         '-i', '--info', action='store_true', help='Show info without converting demo.'
     )
+    mode.add_argument(
+        '--seek-index',
+        action='store_true',
+        help='Only write a seekable index of block offsets and server times next to each demo '
+        '(.idx), without converting demo.',
+    )
     parser.add_argument('-o', '--output', help='Output directory. Default is "out"')
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of demos read in parallel, 0 for all CPU cores. Default is 1',
+    )
+
+    parser.add_argument(
+        '-c',
+        '--cache',
+        action='store_true',
+        help='Skip demos already converted to the output directory.',
+    )
+    parser.add_argument(
+        '--index',
+        help='Demo index file. Info of read demos is added to the index, which can be queried.',
+    )
+    parser.add_argument(
+        '-q',
+        '--query',
+        action='append',
+        metavar='FIELD=VALUE',
+        help='Find demos in the index by map, player, date or game_type, e.g. -q map=aerowalk',
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='table',
+        choices=['table', 'json'],
+        help='Show time and counters of each reading stage per demo as table or JSON.',
+    )
 
     args = parser.parse_args()
+    if args.query:
+        if not args.index:
+            parser.error('--query requires --index')
+        if invalid := [field for field in args.query if '=' not in field]:
+            parser.error('query must be FIELD=VALUE: {}'.format(', '.join(invalid)))
+        query = dict(field.split('=', 1) for field in args.query)
+        if unknown := set(query) - {'map', 'player', 'date', 'game_type'}:
+            parser.error('unknown query field: {}'.format(', '.join(unknown)))
+        with DemoIndex(args.index) as index:
+            demos = index.find(
+                query.get('map'), query.get('player'), query.get('date'), query.get('game_type')
+            )
+            print(index.table(demos))
+        return
+    if args.seek_index:
+        if args.output or args.cache or args.profile or args.index:
+            parser.error(
+                '--seek-index cannot be used with --output, --cache, --index or --profile'
+            )
+        for demo in args.demos:
+            index_demo_blocks(demo)
+        return
+    if args.jobs < 0:
+        parser.error('--jobs must be 0 or more')
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    if jobs > 1 and len(args.demos) > 1:
+        if read_demos(
+            args.demos, not args.info, args.output, jobs, args.profile, args.cache, args.index
+        ):
+            sys.exit(1)
+        return
+
     for demo in args.demos:
-        Demo(demo).read(not args.info, args.output)
+        profile_demo(demo, not args.info, args.output, args.profile, args.cache, args.index)
 
 
 if __name__ == '__main__':
+    freeze_support()
     main()
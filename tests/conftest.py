@@ -0,0 +1,18 @@
+import pytest
+from generator import DemoGenerator
+
+
+@pytest.fixture
+def generate_demo(tmp_path):
+    """
+    Writes a generated demo to the test directory and returns its path. Arguments are passed
+    to generator.DemoGenerator.
+    """
+
+    def generate(duration=1, entities=4, seed=1, name='generated.dm_71', **options):
+        demo_path = tmp_path / name
+        with open(demo_path, 'wb') as demo_file:
+            DemoGenerator(duration, entities=entities, seed=seed, **options).write(demo_file)
+        return demo_path
+
+    return generate
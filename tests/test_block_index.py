@@ -0,0 +1,47 @@
+import os
+
+import pytest
+from block_index import BlockIndex
+from demo import Demo
+
+
+def test_block_index(generate_demo):
+    demo_filename = str(generate_demo(10))
+    demo = Demo(demo_filename)
+    messages = [(msg_seq, msg.get_message_bytes()) for msg_seq, msg in demo.iter_messages()]
+
+    BlockIndex.build(demo).save(demo_filename)
+    block_index = BlockIndex.load(demo_filename, os.path.getsize(demo_filename))
+    assert len(block_index) == len(messages)
+    assert block_index.demo_size == os.path.getsize(demo_filename)
+    assert block_index.server_times[0] == BlockIndex.NO_SNAPSHOT  # game state
+
+    snapshot_times = [time for time in block_index.server_times if time != BlockIndex.NO_SNAPSHOT]
+    assert snapshot_times == [msg.server_time for _, msg in Demo(demo_filename).iter_snapshots()]
+    block = block_index.find_time(snapshot_times[5])
+    assert block_index.server_times[block] == snapshot_times[5]
+    assert block_index.find_time(snapshot_times[5] - 1) == block
+    assert block_index.find_time(snapshot_times[-1] + 1) is None
+
+    with open(demo_filename, 'rb') as demo_file:
+        demo_data = demo_file.read()
+    assert [
+        (msg_seq, msg.get_message_bytes())
+        for msg_seq, msg in block_index.iter_messages(demo_data, block, block + 3)
+    ] == messages[block : block + 3]
+    offset, size = block_index.get_range(0)
+    assert (offset, size) == (0, len(demo_data) - 8)  # without end of demo block
+
+    with pytest.raises(ValueError):
+        BlockIndex.load(demo_filename, len(demo_data) + 1)
+
+
+def test_block_index_without_end_block(tmp_path, generate_demo):
+    converted_filename = Demo(str(generate_demo(2))).read(True, str(tmp_path / 'out'))
+    demo_size = os.path.getsize(converted_filename)
+    block_index = BlockIndex.build(Demo(converted_filename))
+    block_index.save(converted_filename)
+
+    block_index = BlockIndex.load(converted_filename, demo_size)
+    assert block_index.get_range(0) == (0, demo_size)
+    assert block_index.get_range(len(block_index)) == (demo_size, 0)
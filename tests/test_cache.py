@@ -0,0 +1,30 @@
+import os
+
+from cache import ConversionCache
+from demo import Demo
+
+
+def test_conversion_cache(tmp_path, capsys, generate_demo):
+    demo_path = generate_demo()
+    output_dir = tmp_path / 'out'
+
+    converted_filename = Demo(str(demo_path)).read(True, str(output_dir), cache=True)
+    Demo(str(demo_path)).read(True, str(output_dir), cache=True)
+    output = capsys.readouterr().out
+    assert output.startswith('Converted demo') and 'Skipped converted demo' in output
+
+    with ConversionCache(output_dir) as conversion_cache:
+        assert conversion_cache.is_converted(demo_path, converted_filename)
+        os.utime(demo_path, ns=(0, 0))  # same content
+        assert conversion_cache.is_converted(demo_path, converted_filename)
+    with ConversionCache(output_dir, version=0) as conversion_cache:
+        assert not conversion_cache.is_converted(demo_path, converted_filename)
+
+    with open(converted_filename, 'ab') as converted_demo_file:
+        converted_demo_file.write(b'\x00')
+    Demo(str(demo_path)).read(True, str(output_dir), cache=True)
+    assert capsys.readouterr().out.startswith('Converted demo')
+    with ConversionCache(output_dir) as conversion_cache:
+        assert conversion_cache.is_converted(demo_path, converted_filename)
+        demo_path.write_bytes(demo_path.read_bytes()[:-8])
+        assert not conversion_cache.is_converted(demo_path, converted_filename)
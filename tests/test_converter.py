@@ -1,7 +1,9 @@
 import pytest
 from converter import Converter
-from protocol.aftershock import Aftershock
-from protocol.quake3 import Quake3
+
+# registered protocol classes
+from democonverter.protocol.aftershock import Aftershock
+from democonverter.protocol.quake3 import Quake3
 
 
 @pytest.fixture
@@ -10,7 +12,10 @@ def converter():
 
 
 def test_events_map(converter):
-    print(Converter._convert_events_map)
+    assert converter.events_map[53] == 51
+    assert Converter(Aftershock, Quake3).events_map is converter.events_map
+    with pytest.raises(TypeError):
+        converter.events_map[0] = 0
 
 
 def test_entity_type_event_converter(converter):
@@ -22,6 +27,31 @@ def test_entity_type_event_converter(converter):
     assert converter.convert_bit_flag_event(309) == 307  # rail trail on rocket miss
 
 
+def test_compile_rewrite():
+    converter = Converter(Aftershock, Quake3, event_fixes={'eType': {101: 0, 16: 14}})
+    entity_type = converter._compile_rewrite('eType', 8)
+    assert len(entity_type) == 256
+    assert entity_type[101] == 0  # fix
+    assert entity_type[16] == 14  # fix
+    assert entity_type[66] == 62  # event conversion
+    assert entity_type[1] is None
+    assert converter._compile_rewrite('event', 10)[309] == 307
+    assert converter._compile_rewrite('weapon', 8) is None
+    assert converter._compile_rewrite('modelindex', 8) is None
+
+
+def test_converter_registry():
+    converter = Converter.get(Aftershock, Quake3)
+    assert Converter.get(Quake3, Aftershock) is None
+    entity_rewrites = dict(
+        zip(Aftershock.entity_schema.names, converter.get_rewrites(Aftershock.entity_schema))
+    )
+    assert entity_rewrites['modelindex'][61] == 0  # fix
+    assert entity_rewrites['eType'][101] == 0  # fix
+    assert entity_rewrites['eType'][66] == 62  # event conversion
+    assert entity_rewrites['weapon'] is None
+
+
 # statsConvert = {
 #     3: 2,  # fix missing weapon bar ammo
 #     4: 3,  # fix armor value
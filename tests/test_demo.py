@@ -0,0 +1,64 @@
+import io
+from itertools import islice
+
+import pytest
+from demo import Demo
+from generator import DemoGenerator
+
+
+def test_demo_iter_messages(generate_demo):
+    demo_path = generate_demo(2)
+    demo = Demo(str(demo_path))
+    messages = list(demo.iter_messages())
+    assert [msg_seq for msg_seq, _ in messages] == list(
+        range(DemoGenerator(2).get_message_count())
+    )
+    assert sum(8 + msg.get_size() for _, msg in messages) == demo_path.stat().st_size - 8
+    assert all(msg.server_time is None for _, msg in messages)  # not parsed
+
+
+def test_demo_iter_snapshots(generate_demo):
+    demo = Demo(str(generate_demo(2)))
+    snapshots = list(demo.iter_snapshots())
+    assert len(snapshots) == DemoGenerator(2).get_message_count() - 1  # without game state
+    server_times = [msg.server_time for _, msg in snapshots]
+    assert server_times == sorted(server_times)
+    assert snapshots[0][1].player_state_delta and snapshots[0][1].entity_state_deltas
+    assert demo.map and demo.mod == 'aftershock'
+
+
+def test_demo_iter_states(generate_demo):
+    snapshots = list(Demo(str(generate_demo(2))).iter_states())
+    assert [snapshot.message_num for snapshot in snapshots] == list(range(1, len(snapshots) + 1))
+    assert all(snapshot.valid and len(snapshot.entities) == 4 for snapshot in snapshots)
+
+
+def test_demo_iter_stop_early(generate_demo):
+    demo = Demo(str(generate_demo(30)))
+    snapshots = demo.iter_snapshots()
+    first_snapshots = list(islice(snapshots, 20))
+    snapshots.close()  # releases the demo file map
+    assert first_snapshots[-1][1].server_time - first_snapshots[0][1].server_time < 1000
+
+    messages = demo.iter_messages()
+    assert [msg_seq for msg_seq, _ in islice(messages, 3)] == [0, 1, 2]
+    messages.close()
+    assert next(demo.iter_messages())[0] == 0  # starts again from the first block
+
+
+def test_demo_data(tmp_path, generate_demo):
+    demo_path = generate_demo(event_rate=0.5)
+    demo_file = io.BytesIO(demo_path.read_bytes())
+    converted_filename = Demo(str(demo_path)).read(True, str(tmp_path / 'out'))
+    with open(converted_filename, 'rb') as converted_demo_file:
+        converted = converted_demo_file.read()
+
+    assert Demo(data=demo_file.getvalue()).convert() == converted
+    demo_file.seek(0)
+    assert Demo(data=demo_file).convert() == converted
+    output = io.BytesIO()
+    Demo('demo.bin', memoryview(demo_file.getvalue())).convert(output)
+    assert output.getvalue() == converted
+    assert 'Map: ' in Demo(data=demo_file.getvalue()).info()
+    with pytest.raises(ValueError):
+        Demo(data=demo_file.getvalue()).read(True, str(tmp_path / 'out'))
@@ -0,0 +1,23 @@
+import io
+
+import pytest
+from demo import Demo
+from generator import DemoGenerator
+
+
+def test_generator(generate_demo):
+    demo_path = generate_demo(2, entities=8, event_rate=0.5)
+    demo_file = io.BytesIO()
+    DemoGenerator(2, entities=8, event_rate=0.5, seed=1).write(demo_file)
+    assert demo_file.getvalue() == demo_path.read_bytes()
+
+    demo = Demo(str(demo_path))
+    snapshots = list(demo.iter_states())
+    assert len(snapshots) == DemoGenerator(2).get_message_count() - 1
+    assert all(snapshot.valid for snapshot in snapshots)
+    assert len(snapshots[-1].entities) == 8
+    assert demo.mod == 'aftershock' and demo.game_type == Demo.GameType.Duel
+    assert list(demo.clients.values()) == [['player0'], ['player1']]
+
+    with pytest.raises(ValueError):
+        DemoGenerator(entities=DemoGenerator.MAX_ENTITIES + 1)
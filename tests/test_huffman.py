@@ -2088,3 +2088,37 @@ def test_huffman_decode_tree(huffman, q3_decode_table):
     for code in range(2048):
         symbol, length = huffman.decode(util.int2ba(code, length=11, endian='little'))
         assert symbol == decode_table[code][0] and length == decode_table[code][1]
+
+
+def test_huffman_decode_at(huffman):
+    data = bitarray('11010011 01 11001101 00000000 1 0 00000000 100', endian='little')
+    for offset in range(len(data) + 1):
+        try:
+            expected = huffman.decode(data[offset:])
+        except ValueError:
+            with pytest.raises(ValueError):
+                huffman.decode_at(data, offset)
+        else:
+            assert huffman.decode_at(data, offset) == expected
+
+
+def test_huffman_decode_window(huffman, q3_decode_table):
+    for code, word in enumerate(q3_decode_table):
+        window = util.int2ba(code, length=11, endian='little')
+        assert huffman.decode_window(window, 0) == (word % 256, word >> 8)
+
+    data = bitarray('11010011 01 11001101 00000000 1 0 00000000 100', endian='little')
+    for offset in range(len(data) + 1):
+        try:
+            expected = huffman.decode_at(data, offset)
+        except ValueError:
+            with pytest.raises(ValueError):
+                huffman.decode_window(data, offset)
+        else:
+            assert huffman.decode_window(data, offset) == expected
+
+
+def test_huffman_tables_shared(huffman):
+    assert Huffman().get_tables() is huffman.get_tables()
+    with pytest.raises(TypeError):
+        huffman._encoder_table[0] = bitarray('1')
@@ -0,0 +1,31 @@
+from demo import Demo
+from index import DemoIndex
+
+
+def test_demo_index(tmp_path, generate_demo):
+    demo_path = generate_demo(30, clients=3)
+
+    with DemoIndex(tmp_path / 'index.sqlite') as index:
+        Demo(str(demo_path)).read(False, None, index=index)
+        Demo(str(demo_path)).read(True, str(tmp_path / 'out'), index=index)  # replaces
+        assert len(index.find()) == 1
+
+    with DemoIndex(tmp_path / 'index.sqlite') as index:
+        demos = index.find(player='player2', game_type='FFA', date='2024-04')
+        assert len(demos) == 1
+        assert demos[0]['path'] == str(demo_path.resolve())
+        assert demos[0]['protocol'] == 71 and demos[0]['mod'] == 'aftershock'
+        assert [name for name, score in demos[0]['clients']] == ['player0', 'player1', 'player2']
+        assert all(score is not None for name, score in demos[0]['clients'])
+        assert index.find(map_name=demos[0]['map'])
+        assert not index.find(player='player3')
+        assert 'player2' in index.table(demos)
+
+
+def test_demo_index_clients(tmp_path, generate_demo):
+    demo_path = generate_demo(1)  # no scores yet
+    with DemoIndex(tmp_path / 'index.sqlite') as index:
+        Demo(str(demo_path)).read(True, str(tmp_path / 'out'), index=index)
+        assert index.find()[0]['clients'] == []
+        Demo(str(demo_path)).read(False, None, index=index)
+        assert index.find()[0]['clients'] == []
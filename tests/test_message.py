@@ -1,3 +1,8 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
 from bitarray import bitarray
 from message import Message
 
@@ -79,3 +84,100 @@ def test_message_read(msg):
     msg.index = 0
     msg = Message(bitarray('1111 0011 0011 1110 0110 1010 01'))
     assert msg.read_long() == 1_000_000
+
+
+def test_message_read_many():
+    bit_sizes = [32, 0, 8, -16, 10, 0, 1, 19, -8, 0, 16] * 2
+    data = bitarray(endian='little')
+    data.frombytes(bytes((i * 37 + 11) % 256 | 1 for i in range(32)))
+    for check_null in (False, True):
+        for start in range(0, 64, 7):
+            msg = Message(data)
+            msg.index = start
+            expected = []
+            try:
+                for bit_size in bit_sizes:
+                    if not msg.read_boolean():
+                        expected.append(None)
+                    elif check_null and not msg.read_boolean():
+                        expected.append(0)
+                    elif bit_size:
+                        expected.append(msg.read_bits(abs(bit_size), signed=bit_size < 0))
+                    else:
+                        expected.append(msg.read_float())
+            except ValueError:  # read past the end of message
+                msg.index = start
+                with pytest.raises(ValueError):
+                    msg.read_many(bit_sizes, check_null)
+                continue
+            index = msg.index
+
+            msg.index = start
+            assert msg.read_many(bit_sizes, check_null) == expected and msg.index == index
+
+
+def test_message_write_bits_convert():
+    data = bitarray('1100 1101 0011 1101 1000 0011 1001 1001 1010 1111 0110 1', endian='little')
+    # (input offset, input size, bit count, value)
+    writes = [(0, 8, 8, 23), (0, 8, 8, 61), (8, 9, 10, 309), (20, 16, 16, 1), (40, 5, 5, 0)]
+
+    msg = Message(data, True)
+    expected = bitarray(endian='little')
+    for offset, size, count, value in writes:
+        msg.index = offset + size
+        msg.write_bits(value, count, offset)
+        assert msg.index == offset + size
+
+        code = Message(bitarray())
+        code.write_bits(value, count)
+        if offset == 0:
+            expected = code._data
+        else:
+            expected += data[previous_end:offset] + code._data
+        previous_end = offset + size
+    expected += data[previous_end:]
+    expected.fill()
+
+    msg.fill()
+    assert msg.get_message_bytes() == expected.tobytes()
+    assert msg.get_size() == len(expected) / 8
+    assert msg._data == data
+
+
+def test_message_memoryview():
+    data = bytearray(b'\xbc\xc1\x99\xf5')
+    msg = Message(memoryview(data), True)
+    assert msg.read_long() == 7_292_859
+    data[0] = 0
+    assert msg._data[:8] == bitarray('0000 0000')
+
+
+def test_message_unchanged_convert():
+    data = b'\xbc\xc1\x99\xf5'
+    msg = Message(data, True)
+    assert msg.read_long() == 7_292_859
+    msg.write_bits(7_292_859, 32, 0)  # same code as input
+    msg.fill()
+    assert msg.get_message_bytes() is data
+    assert msg.get_size() == 4
+
+    msg.write_bits(1, 32, 0)
+    msg.fill()
+    assert msg.get_message_bytes() != data
+
+
+def test_message_import():
+    huffman_tables = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'from democonverter.message import Message\n'
+            'from democonverter.huffman import Huffman\n'
+            'print(Huffman._tables)',
+        ],
+        cwd=pathlib.Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert huffman_tables == 'None\n'
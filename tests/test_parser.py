@@ -37,7 +37,7 @@ def data_player_stats():
 
 def test_parser_player_state(data_player_stats):
     m = Message(data_player_stats)
-    p = Parser(None)
+    p = Parser(None, delta_sink=Parser.store_delta)
 
     p._demo.game_protocol = Aftershock
     p._msg = Message(data_player_stats)
@@ -73,3 +73,66 @@ def test_parser_player_state(data_player_stats):
         'delta_angles0': 33632,  # not present with cl_shownet 2
         'weapon': 5,  # not present with cl_shownet 2
     }
+
+
+def test_parser_skip_snapshot():
+    msg = Message(bitarray())
+    msg.write_bits(0, 32)  # reliable_ack
+    msg.write_bits(5, 8)  # command string
+    msg.write_bits(1, 32)
+    for char in b'scores 1\0':
+        msg.write_bits(char, 8)
+    msg.write_bits(7, 8)  # snapshot
+    msg.write_bits(1234, 32)
+    msg.index = 0
+
+    p = Parser(None, snapshots=False)
+    assert p.parse_message(msg) == 'scores 1'
+    assert msg.index < msg.get_size_bits()
+
+
+@pytest.fixture
+def data_snapshot():
+    msg = Message(bitarray())
+    for value, count in [
+        (0, 32),  # reliable_ack
+        (7, 8),  # snapshot
+        (1000, 32),  # server time
+        (0, 8),  # delta number
+        (0, 8),  # snap flags
+        (1, 8),  # area bytes
+        (0, 8),  # area mask
+        (1, 8),  # player state field count
+        (1, 1),  # commandTime changed
+        (990, 32),
+        (0, 1),  # no stats
+        (5, 10),  # entity number
+        (0, 1),  # not removed
+        (1, 1),  # delta
+        (1, 8),  # field count
+        (1, 1),  # pos.trTime changed
+        (1, 1),  # not null
+        (42, 32),
+        (1023, 10),  # end of entities
+        (8, 8),  # EOF
+    ]:
+        msg.write_bits(value, count)
+    return msg._data
+
+
+def test_parser_delta_sink(data_snapshot):
+    class Demo:
+        game_protocol = Aftershock
+
+    deltas = []
+    p = Parser(Demo(), delta_sink=lambda msg, number, delta: deltas.append((number, delta)))
+    msg = Message(data_snapshot)
+    p.parse_message(msg)
+    assert msg.server_time == 1000
+    assert deltas == [(None, {'commandTime': 990}), (5, {'pos.trTime': 42})]
+    assert msg.player_state_delta is None and msg.entity_state_deltas is None
+
+    msg = Message(data_snapshot)
+    Parser(Demo(), delta_sink=Parser.store_delta).parse_message(msg)
+    assert msg.player_state_delta == {'commandTime': 990}
+    assert msg.entity_state_deltas == [{'pos.trTime': 42}]
@@ -0,0 +1,44 @@
+from bitarray import bitarray
+from generator import DemoGenerator
+from huffman import Huffman
+from profiler import Demo, Message, Profiler
+
+
+def test_profiler(tmp_path, generate_demo):
+    demo_path = generate_demo(event_rate=0.5)
+    read_bits = Message.read_bits
+
+    with Profiler() as profiler:
+        assert Message.read_bits is not read_bits
+        Demo(str(demo_path)).read(True, str(tmp_path / 'out'))
+    assert Message.read_bits is read_bits
+
+    stages = profiler.to_dict()
+    message_count = DemoGenerator(1).get_message_count()
+    assert stages['demo read']['calls'] == message_count
+    assert stages['demo read']['bytes'] == demo_path.stat().st_size - 8 * (message_count + 1)
+    assert stages['parse snapshot']['calls'] == message_count - 1
+    assert stages['decode delta fields']['bits'] > stages['decode delta fields']['symbols'] > 0
+    assert stages['demo write']['bytes'] > 0
+    assert 'parse message' in profiler.report()
+
+
+def test_profiler_unchanged_write():
+    msg = Message(bytes([0x12, 0x34, 0x56]), True)
+    with Profiler() as profiler:
+        value = msg.read_bits(8)
+        msg.write_bits(value, 8, 0)  # same code as input
+        assert profiler.to_dict()['encode bits']['calls'] == 0
+        msg.write_bits(value ^ 1, 8, 0)
+    encode = profiler.to_dict()['encode bits']
+    assert (encode['calls'], encode['bits'], encode['symbols']) == (1, 8, 1)
+
+
+def test_profiler_read_many_end_of_message():
+    msg = Message(bitarray('1', endian='little') + Huffman().encode(65))  # read field by field
+    with Profiler() as profiler:
+        assert msg.read_many((8,)) == [65]
+    stages = profiler.to_dict()
+    assert (stages['decode bits']['calls'], stages['decode bits']['bits']) == (0, 0)
+    assert stages['decode delta fields']['bits'] == len(msg._data)
+    assert stages['decode delta fields']['symbols'] == 1
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+from index import DemoIndex
+
+from run import main, read_demos
+
+
+def test_read_demos(tmp_path, capsys, generate_demo):
+    demos = [
+        str(generate_demo(name='first.dm_71')),
+        str(tmp_path / 'missing.dm_71'),
+        str(generate_demo(2, name='second.dm_71')),
+    ]
+    assert read_demos(demos, False, None, 2) == 1
+    output, progress = capsys.readouterr()
+    assert output.index('Demo: {}'.format(demos[0])) < output.index('Demo: {}'.format(demos[2]))
+    assert progress.splitlines() == [
+        '[1/3] {} done'.format(demos[0]),
+        '[2/3] {} failed: Demo not found'.format(demos[1]),
+        '[3/3] {} done'.format(demos[2]),
+    ]
+
+
+def test_read_demos_exit_status(tmp_path, monkeypatch, generate_demo):
+    demos = [str(generate_demo()), str(tmp_path / 'missing.dm_71')]
+    monkeypatch.setattr(sys, 'argv', ['democonverter', '-i', '-j', '2', *demos])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+
+
+def test_query_field(tmp_path, monkeypatch, capsys):
+    index_filename = str(tmp_path / 'index.sqlite')
+    monkeypatch.setattr(sys, 'argv', ['democonverter', '--index', index_filename, '-q', 'aero'])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert 'query must be FIELD=VALUE: aero' in capsys.readouterr().err
+
+
+def test_seek_index(monkeypatch, capsys, generate_demo):
+    demo_filename = str(generate_demo())
+    monkeypatch.setattr(sys, 'argv', ['democonverter', '--seek-index', '-o', 'out', demo_filename])
+    with pytest.raises(SystemExit):
+        main()
+    assert '--seek-index cannot be used with --output' in capsys.readouterr().err
+
+    monkeypatch.setattr(sys, 'argv', ['democonverter', '--seek-index', demo_filename])
+    main()
+    assert capsys.readouterr().out.startswith('Indexed')
+    assert os.path.exists(demo_filename + '.idx')
+
+
+def test_negative_jobs(monkeypatch, capsys, generate_demo):
+    monkeypatch.setattr(sys, 'argv', ['democonverter', '-i', '-j', '-1', str(generate_demo())])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert '--jobs must be 0 or more' in capsys.readouterr().err
+
+
+def test_cache_index(tmp_path, monkeypatch, capsys, generate_demo):
+    demo_filename = str(generate_demo())
+    output_dir = str(tmp_path / 'out')
+    index_filename = str(tmp_path / 'index.sqlite')
+    monkeypatch.setattr(sys, 'argv', ['democonverter', '-c', '-o', output_dir, demo_filename])
+    main()
+    monkeypatch.setattr(sys, 'argv', [*sys.argv[:-1], '--index', index_filename, demo_filename])
+    main()
+    assert 'Skipped converted demo' in capsys.readouterr().out
+
+    with DemoIndex(index_filename) as index:
+        demos = index.find()
+    assert len(demos) == 1 and demos[0]['map']
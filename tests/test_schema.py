@@ -0,0 +1,28 @@
+from protocol.quake3 import Quake3
+from protocol.quakelive import QuakeLive
+from protocol.schema import Schema, StateRecord
+
+
+def test_schema():
+    schema = Schema(Quake3.entity_states)
+    assert len(schema) == len(Quake3.entity_states)
+    assert schema.names[0] == 'pos.trTime'
+    assert schema.ids['eType'] == schema.names.index('eType')
+    assert list(schema.bit_sizes) == [state.bit_size for state in Quake3.entity_states]
+    assert schema.floats[schema.ids['pos.trBase[0]']]
+    assert not schema.signed[schema.ids['eType']]
+
+    assert len(QuakeLive.entity_schema) == len(QuakeLive.entity_states)
+    assert len(QuakeLive.player_schema) == len(QuakeLive.player_states)
+
+
+def test_state_record():
+    schema = Quake3.player_schema
+    record = StateRecord(schema, [990, None, 3])
+    assert record['commandTime'] == 990
+    assert record[2] == 3
+    assert record.get('pm_type') is None
+    assert record.get('weapon', -1) == -1
+    assert record.to_dict() == {'commandTime': 990, schema.names[2]: 3}
+    assert record == {'commandTime': 990, schema.names[2]: 3}
+    assert record == StateRecord(schema, [990, None, 3])
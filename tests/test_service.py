@@ -0,0 +1,28 @@
+import asyncio
+import io
+
+import pytest
+from generator import DemoGenerator
+from service import DemoService, read_demo_bytes
+
+
+@pytest.fixture
+def demo_data():
+    demo_file = io.BytesIO()
+    DemoGenerator(1, entities=4, event_rate=0.5, seed=1).write(demo_file)
+    return demo_file.getvalue()
+
+
+def test_service(demo_data):
+    async def read_demos():
+        async with DemoService(jobs=2, queue_size=1) as service:
+            converted = await asyncio.gather(*[service.convert(demo_data) for _ in range(3)])
+            info = await service.info(demo_data)
+            with pytest.raises(ValueError):
+                await service.convert(b'\x00' * 4 + b'\x08\x00\x00\x00' + b'\xff' * 8)
+        return converted, info
+
+    converted, info = asyncio.run(read_demos())
+    assert converted == [read_demo_bytes(demo_data, True)] * 3
+    assert converted[0] != demo_data
+    assert 'Protocol: 71 (aftershock)' in info
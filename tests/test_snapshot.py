@@ -0,0 +1,40 @@
+from snapshot import SnapshotStates
+
+
+def test_snapshot_states():
+    states = SnapshotStates(3, 2)
+    states.set_baseline(5, [7])
+    states.set_baseline(6, None)
+
+    states.begin_snapshot(10, 1000, 0, 0)
+    states.delta_player_state([1, None, 2.5])
+    states.set_stat(0, 1, 100)
+    states.delta_entity(1, [3, 4])
+    states.delta_entity(5, None)  # no delta from baseline
+    states.delta_entity(8, [None, 9])
+    snapshot = states.end_snapshot()
+    assert snapshot.valid and snapshot.delta_num is None
+    assert snapshot.player_state == (1, 0, 2.5)
+    assert snapshot.stats[0][1] == 100
+    assert snapshot.entities == {1: (3, 4), 5: (7, 0), 8: (0, 9)}
+
+    states.begin_snapshot(12, 1050, 2, 0)  # delta from 10
+    states.delta_player_state([None, 5])
+    states.delta_entity(5, None, remove=True)
+    states.delta_entity(6, [1])  # new entity from baseline
+    states.delta_entity(8, [2])
+    delta_snapshot = states.end_snapshot()
+    assert delta_snapshot.valid and delta_snapshot.delta_num == 10
+    assert delta_snapshot.player_state == (1, 5, 2.5)
+    assert delta_snapshot.stats == snapshot.stats
+    assert delta_snapshot.entities == {1: (3, 4), 6: (1, 0), 8: (2, 9)}
+    assert delta_snapshot.entities[1] is snapshot.entities[1]
+
+    states.begin_snapshot(13, 1075, 2, 0)  # delta from 11 which was not received
+    assert not states.end_snapshot().valid
+    states.begin_snapshot(12 + SnapshotStates.PACKET_BACKUP, 2000, 0, 0)
+    states.end_snapshot()
+    states.begin_snapshot(
+        13 + SnapshotStates.PACKET_BACKUP, 2025, SnapshotStates.PACKET_BACKUP + 1, 0
+    )
+    assert not states.end_snapshot().valid  # delta from 12 was replaced in backup
@@ -0,0 +1,17 @@
+import io
+
+from writer import DemoWriter
+
+
+def test_demo_writer():
+    blocks = [(0, b'\x01\x02\x03'), (1, b'\x04' * 20), (-1, b''), (2, b'\x05\x06')]
+    expected = b''.join(
+        seq.to_bytes(4, 'little', signed=True) + len(msg).to_bytes(4, 'little') + msg
+        for seq, msg in blocks
+    )
+
+    demo_file = io.BytesIO()
+    with DemoWriter(demo_file, buffer_size=16) as demo_writer:
+        for seq, msg in blocks:
+            demo_writer.write(seq, msg)
+    assert demo_file.getvalue() == expected